@@ -1,3 +1,6 @@
+import os
+from pathlib import Path
+
 GROQ_MODELS = {
     "Mixtral 8x7B": {
         "id": "mixtral-8x7b-32768",
@@ -19,4 +22,141 @@ GROQ_MODELS = {
         "description": "Anthropic's most powerful model",
         "context_length": 200000,
     }
-}
\ No newline at end of file
+}
+
+# Local caches live under this directory unless overridden
+CACHE_DIR = os.getenv("APP_CACHE_DIR", str(Path(__file__).resolve().parent.parent / ".cache"))
+
+# PDF text extraction
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", os.cpu_count() or 1))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", 8))
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(CACHE_DIR, "pdf_text"))
+PDF_CACHE_MAX_MB = float(os.getenv("PDF_CACHE_MAX_MB", 512))
+
+# Streaming ingestion: text buffered before chunking and chunks per embedding batch
+CHUNK_BUFFER_CHARS = int(os.getenv("CHUNK_BUFFER_CHARS", 50000))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 64))
+
+# Token-aware chunking, sized from each model's context_length
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "cl100k_base")
+DEFAULT_CONTEXT_LENGTH = 4096
+RETRIEVER_K = 4
+RAG_CONTEXT_FRACTION = 0.25
+RAG_CHUNK_TOKENS_RANGE = (128, 512)
+# Summarization chunks fill the context less the prompt and the summary written back; tiktoken
+# can count fewer tokens than a model's own tokenizer, so only SUMMARY_TOKEN_MARGIN of that is used
+SUMMARY_OUTPUT_TOKENS = int(os.getenv("SUMMARY_OUTPUT_TOKENS", 1024))
+SUMMARY_TOKEN_MARGIN = 0.9
+# Chunk summaries requested from Groq at once when summarizing long text
+SUMMARY_MAP_CONCURRENCY = int(os.getenv("SUMMARY_MAP_CONCURRENCY", 8))
+
+# Near-duplicate chunk removal before embedding (MinHash LSH)
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.85))
+DEDUP_NUM_PERM = 64
+DEDUP_BANDS = 16
+DEDUP_SHINGLE_SIZE = 5
+
+# Embedding model shared by all sessions; optionally loaded when the app starts
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "true").lower() == "true"
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", os.path.join(CACHE_DIR, "embeddings"))
+EMBEDDING_CACHE_MAX_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", 1024))
+
+# Named FAISS index snapshots
+INDEX_STORE_DIR = os.getenv("INDEX_STORE_DIR", os.path.join(CACHE_DIR, "indexes"))
+
+# Approximate nearest-neighbour index selection by corpus size
+ANN_FLAT_MAX_VECTORS = int(os.getenv("ANN_FLAT_MAX_VECTORS", 20000))
+ANN_HNSW_MAX_VECTORS = int(os.getenv("ANN_HNSW_MAX_VECTORS", 500000))
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", 64))
+IVF_NPROBE_FRACTION = float(os.getenv("IVF_NPROBE_FRACTION", 1 / 16))
+
+# Vector storage precision: float32, float16, sq8 (8-bit scalar) or pq
+# (product quantized). Compressed indexes re-rank RESCORE_FACTOR * k
+# candidates with the full-precision vectors kept in the embedding cache
+VECTOR_STORAGE = os.getenv("VECTOR_STORAGE", "float32").lower()
+RESCORE_FACTOR = int(os.getenv("RESCORE_FACTOR", 4))
+PQ_SUB_DIMS = 8
+
+# Hybrid retrieval: BM25 keyword matches fused with dense results by
+# reciprocal rank; each retriever contributes HYBRID_FETCH_K candidates
+HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+HYBRID_FETCH_K = int(os.getenv("HYBRID_FETCH_K", 20))
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60
+
+# Shared HTTP connection pool for all Groq requests. GROQ_BASE_URL points
+# the clients at another endpoint, e.g. a proxy or a local stand-in
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 20))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 10))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 60))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 120))
+
+# Conversation history: recent turns are sent verbatim, older ones as a
+# rolling summary, together taking at most HISTORY_CONTEXT_FRACTION of the
+# model's context and always leaving ANSWER_RESERVE_FRACTION for the reply
+HISTORY_CONTEXT_FRACTION = float(os.getenv("HISTORY_CONTEXT_FRACTION", 0.25))
+HISTORY_RECENT_TURNS = int(os.getenv("HISTORY_RECENT_TURNS", 4))
+HISTORY_SUMMARY_FRACTION = 0.4
+ANSWER_RESERVE_FRACTION = 0.25
+PROMPT_OVERHEAD_TOKENS = 200
+
+# Response cache shared by all sessions, keyed on model, language, retrieved
+# context and normalised question. Similar questions matching by embedding
+# is opt-in: set RESPONSE_CACHE_SIMILARITY to a cosine threshold such as 0.95
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(CACHE_DIR, "responses.sqlite"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 24 * 3600))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 5000))
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", 0))
+
+# Persistent cache of URL summaries, keyed on source and model: final summaries
+# per summary type, and the chunk summaries a new summary type is reduced from
+SUMMARY_CACHE_ENABLED = os.getenv("SUMMARY_CACHE_ENABLED", "true").lower() == "true"
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", os.path.join(CACHE_DIR, "summaries.sqlite"))
+SUMMARY_CACHE_TTL_SECONDS = float(os.getenv("SUMMARY_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", 2000))
+
+# Web pages fetched for URL summaries: keep-alive connections, timeouts, a
+# download cap, and an on-disk cache revalidated with ETag / Last-Modified
+WEB_CONNECT_TIMEOUT_SECONDS = float(os.getenv("WEB_CONNECT_TIMEOUT_SECONDS", 5))
+WEB_READ_TIMEOUT_SECONDS = float(os.getenv("WEB_READ_TIMEOUT_SECONDS", 15))
+WEB_FETCH_DEADLINE_SECONDS = float(os.getenv("WEB_FETCH_DEADLINE_SECONDS", 30))
+WEB_MAX_MB = float(os.getenv("WEB_MAX_MB", 5))
+WEB_POOL_SIZE = int(os.getenv("WEB_POOL_SIZE", 10))
+WEB_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+WEB_CACHE_ENABLED = os.getenv("WEB_CACHE_ENABLED", "true").lower() == "true"
+WEB_CACHE_DIR = os.getenv("WEB_CACHE_DIR", os.path.join(CACHE_DIR, "web"))
+WEB_CACHE_MAX_MB = float(os.getenv("WEB_CACHE_MAX_MB", 256))
+# Served without revalidating for this long, unless the page sets Cache-Control max-age
+WEB_CACHE_FRESH_SECONDS = float(os.getenv("WEB_CACHE_FRESH_SECONDS", 600))
+
+# Groq calls are queued per API key and model to stay inside its rate limits;
+# models in GROQ_MODELS can override the limits with "requests_per_minute"
+# and "tokens_per_minute". 429s and transient errors are retried with
+# jittered exponential backoff, or after the server's Retry-After
+GROQ_REQUESTS_PER_MINUTE = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", 30))
+GROQ_TOKENS_PER_MINUTE = int(os.getenv("GROQ_TOKENS_PER_MINUTE", 15000))
+GROQ_OUTPUT_TOKENS_ESTIMATE = int(os.getenv("GROQ_OUTPUT_TOKENS_ESTIMATE", 512))
+# A slot is reused only this long after the window frees it, as Groq counts a
+# request when it arrives, a little after the scheduler sends it
+GROQ_RATE_LIMIT_MARGIN_SECONDS = float(os.getenv("GROQ_RATE_LIMIT_MARGIN_SECONDS", 1.0))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", 4))
+GROQ_BACKOFF_BASE_SECONDS = float(os.getenv("GROQ_BACKOFF_BASE_SECONDS", 1.0))
+GROQ_BACKOFF_MAX_SECONDS = float(os.getenv("GROQ_BACKOFF_MAX_SECONDS", 30.0))
+
+# Per-stage tracing of requests. Finished traces can be appended to a JSON
+# lines file, and stage totals written in the Prometheus text format for a
+# textfile collector; both are off unless a path is set
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", "")
+METRICS_PATH = os.getenv("METRICS_PATH", "")
+DEBUG_PANEL = os.getenv("DEBUG_PANEL", "false").lower() == "true"
@@ -15,6 +15,13 @@ if str(current_dir) not in sys.path:
 # Load environment variables
 load_dotenv()
 
+from config import EMBEDDING_WARMUP
+from utils.embeddings import warm_up_embeddings
+
+# Load the shared embedding model once per server process, in the background
+if EMBEDDING_WARMUP:
+    warm_up_embeddings()
+
 def load_lottie_url(url: str):
     r = requests.get(url)
     if r.status_code != 200:
@@ -4,55 +4,45 @@ import os
 import sys
 from pathlib import Path
 from youtube_transcript_api import YouTubeTranscriptApi
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse, parse_qs
 import re
-from langchain.chains.summarize import load_summarize_chain
-from langchain.docstore.document import Document
-from langchain_groq import ChatGroq
-from langchain.prompts import PromptTemplate
-from langchain_text_splitters import RecursiveCharacterTextSplitter  # Updated import
+import time
 
 # Add the parent directory to sys.path
 current_dir = Path(__file__).parent.parent
 sys.path.append(str(current_dir))
 
 # Now use absolute imports
+from config import DEBUG_PANEL, GROQ_MODELS, RESPONSE_CACHE_ENABLED, SUMMARY_CACHE_ENABLED
 from utils.chat_utils import (
-    get_pdf_text,
-    get_text_chunks,
-    get_vectorstore,
     get_conversation_chain,
-    initialize_chain
+    get_document_index,
+    get_upload_key,
+    get_history,
+    ingest_pdfs,
+    initialize_chain,
+    answer_with_sources,
+    stream_chat_answer,
+    AnswerStreamHandler,
+    TokenStream
 )
+from utils.embeddings import get_embedding_service
+from utils.index_store import list_indexes, load_index, save_index
+from utils.llm_client import get_chat_model, llm_flights
+from utils.pdf_cache import get_pdf_cache
+from utils.response_cache import get_response_cache
+from utils.scheduler import PRIORITY_BACKGROUND, get_scheduler
+from utils.summarizer import summarize_source
+from utils.summary_cache import get_summary_cache
+from utils.text_chunker import count_tokens
+from utils.tracing import record, span, trace, waterfall
+from utils.web_fetcher import get_web_fetcher
+
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise ValueError("GROQ_API_KEY not found in environment variables")
 
-GROQ_MODELS = {
-    "Mixtral 8x7B": {
-        "id": "mixtral-8x7b-32768",
-        "description": "Powerful open-source model with broad capabilities",
-        "context_length": 32768,
-    },
-    "LLaMA2 70B": {
-        "id": "llama2-70b", # Fixed model ID
-        "description": "Meta's largest model with strong general capabilities",
-        "context_length": 4096,
-    },
-    "Gemma 7B": {
-        "id": "gemma-7b-it",
-        "description": "Google's efficient model optimized for instruction following",
-        "context_length": 8192,
-    },
-    "Claude 3 Opus": {
-        "id": "claude-3-opus-20240229",
-        "description": "Anthropic's most powerful model",
-        "context_length": 200000,
-    }
-}
-
 def get_youtube_id(url):
     """Extract YouTube video ID from URL"""
     parsed_url = urlparse(url)
@@ -68,31 +58,34 @@ def get_youtube_id(url):
 def get_youtube_transcript(video_id):
     """Get transcript of YouTube video"""
     try:
-        transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-        transcript = ' '.join([item['text'] for item in transcript_list])
+        with span("youtube_transcript") as transcript_span:
+            transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
+            transcript = ' '.join([item['text'] for item in transcript_list])
+            transcript_span.set(chars=len(transcript))
         return transcript
     except Exception as e:
         st.error(f"Error getting YouTube transcript: {str(e)}")
         return None
 
-def get_website_content(url):
+def get_website_content(url, refresh=False):
     """Extract main content from website"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(url, headers=headers)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
-        
-        # Get text content
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
+        with span("fetch_website") as fetch_span:
+            page = get_web_fetcher().fetch(url, refresh=refresh)
+            fetch_span.set(status=page.status, bytes=len(page.content), source=page.source)
+        with span("parse_html") as parse_span:
+            soup = BeautifulSoup(page.content, 'html.parser', from_encoding=page.encoding)
+            
+            # Remove script and style elements
+            for script in soup(["script", "style"]):
+                script.decompose()
+            
+            # Get text content
+            text = soup.get_text()
+            lines = (line.strip() for line in text.splitlines())
+            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+            text = ' '.join(chunk for chunk in chunks if chunk)
+            parse_span.set(chars=len(text))
         
         return text
     except Exception as e:
@@ -101,73 +94,26 @@ def get_website_content(url):
 
 
 
-def summarize_text(text, summary_type="concise"):
-    """Summarize the given text"""
+def show_trace_panel():
+    """Debug expander with the stage waterfall of this session's last traced request"""
+    last_trace = st.session_state.get("last_trace")
+    if DEBUG_PANEL and last_trace is not None:
+        with st.expander(f"🔍 Debug: last request ({last_trace.name})", expanded=False):
+            st.code(waterfall(last_trace), language=None)
+
+def summarize_content(source, fetch, summary_type="concise", refresh=False):
+    """Summarize the text fetch() returns for source, reusing cached summaries unless refresh"""
     try:
-        llm = ChatGroq(
-            groq_api_key=st.session_state.groq_api_key,
-            model=st.session_state.selected_model_id
+        # Bulk summarization yields to chat turns when the rate limit is tight
+        llm = get_chat_model(
+            st.session_state.selected_model_id, st.session_state.groq_api_key, priority=PRIORITY_BACKGROUND
         )
-        
-        # Create text splitter
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=4000,  # Adjust based on model's context length
-            chunk_overlap=200,
-            length_function=len,
+        stats = {}
+        summary = summarize_source(
+            source, fetch, llm, st.session_state.selected_model_id, summary_type, refresh=refresh, stats=stats
         )
-        
-        # Split text into chunks
-        texts = text_splitter.split_text(text)
-        
-        # Process each chunk
-        summaries = []
-        for chunk in texts:
-            # Define prompt template for each chunk
-            prompt = PromptTemplate(
-                template="Summarize the following text concisely:\n\n{text}\n\nSummary:",
-                input_variables=["text"]
-            )
-            
-            # Create chain for chunk
-            chain = load_summarize_chain(
-                llm,
-                chain_type="stuff",
-                prompt=prompt
-            )
-            
-            # Process chunk
-            doc = [Document(page_content=chunk)]
-            chunk_summary = chain.invoke({
-                "input_documents": doc,
-                "text": chunk
-            })
-            summaries.append(chunk_summary["output_text"])
-        
-        # Combine chunk summaries
-        if len(summaries) > 1:
-            # Create final summary from all chunks
-            final_text = " ".join(summaries)
-            prompt = PromptTemplate(
-                template="""Combine and create a final {summary_type} summary of the following summaries:
-                \n\n{text}\n\nFinal Summary:""",
-                input_variables=["text", "summary_type"]
-            )
-            
-            chain = load_summarize_chain(
-                llm,
-                chain_type="stuff",
-                prompt=prompt
-            )
-            
-            final_doc = [Document(page_content=final_text)]
-            final_summary = chain.invoke({
-                "input_documents": final_doc,
-                "text": final_text,
-                "summary_type": summary_type
-            })
-            return final_summary["output_text"]
-        else:
-            return summaries[0]
+        record(summary_calls=stats["calls"], summary_tokens=stats["tokens"], summary_cached=stats["cached"])
+        return summary
     
     except Exception as e:
         st.error(f"Error in summarization: {str(e)}")
@@ -300,6 +246,8 @@ def show_chat_interface():
             index=0,
             label_visibility="collapsed"
         )
+        # Chunk sizes depend on the model, so store it before any processing
+        st.session_state.selected_model_id = GROQ_MODELS[selected_model]['id']
         
         # Model Details
         with st.expander("ℹ️ Model Details", expanded=False):
@@ -311,6 +259,42 @@ def show_chat_interface():
                     <p><strong>Context Length:</strong> {model_info['context_length']} tokens</p>
                 </div>
             """, unsafe_allow_html=True)
+            index_info = st.session_state.doc_index.index_info() if "doc_index" in st.session_state else None
+            if index_info and index_info["vectors"]:
+                st.caption(
+                    f"Vector memory: {index_info['bytes_per_vector']:.0f} bytes per chunk "
+                    f"({index_info['storage']}, {index_info['dim'] * 4} as float32) · "
+                    f"{index_info['vectors'] * index_info['bytes_per_vector'] / (1024 * 1024):.1f} MB for "
+                    f"{index_info['vectors']} chunks"
+                )
+            if RESPONSE_CACHE_ENABLED:
+                cache_stats = get_response_cache().stats()
+                st.caption(
+                    f"Response cache: {cache_stats['hit_rate']:.0%} hit rate "
+                    f"({cache_stats['hits']} hits, {cache_stats['semantic_hits']} similar) · "
+                    f"{cache_stats['saved_seconds']:.1f}s saved · {cache_stats['entries']} entries"
+                )
+            scheduler_stats = get_scheduler().stats()
+            if scheduler_stats["requests"]:
+                st.caption(
+                    f"Groq queue: {scheduler_stats['queued']} waiting · "
+                    f"wait {scheduler_stats['avg_wait_seconds']:.2f}s avg, "
+                    f"{scheduler_stats['max_wait_seconds']:.1f}s max · "
+                    f"{scheduler_stats['retries']} retries ({scheduler_stats['rate_limited']} rate limited)"
+                )
+            if SUMMARY_CACHE_ENABLED:
+                summary_stats = get_summary_cache().stats()
+                if summary_stats["hits"] + summary_stats["misses"]:
+                    st.caption(
+                        f"Summary cache: {summary_stats['hits']} hits, {summary_stats['misses']} misses · "
+                        f"{summary_stats['entries']} entries"
+                    )
+            flight_stats = llm_flights.stats()
+            if flight_stats["coalesced"]:
+                st.caption(
+                    f"Groq calls: {flight_stats['calls']} sent, "
+                    f"{flight_stats['coalesced']} identical requests shared an in-flight call"
+                )
         
         # Language Selection
         st.markdown('<div class="section-header">🌐 Language</div>', unsafe_allow_html=True)
@@ -330,30 +314,106 @@ def show_chat_interface():
             label_visibility="collapsed"
         )
         
+        # Keep the index in step with the uploader: removed files lose their vectors
+        doc_index = st.session_state.doc_index
+        if len(doc_index):
+            removed = doc_index.sync(
+                (get_upload_key(pdf) for pdf in pdf_docs or []),
+                candidates=st.session_state.get("upload_keys", {}).values()
+            )
+            if removed:
+                st.toast(f"🗑️ Removed {', '.join(removed)} from the index")
+        
         # Action Buttons
         col1, col2 = st.columns(2)
         with col1:
             if st.button("🔄 Process", use_container_width=True):
                 if pdf_docs:
-                    with st.spinner("Processing documents..."):
-                        try:
-                            raw_text = get_pdf_text(pdf_docs)
-                            text_chunks = get_text_chunks(raw_text)
-                            st.session_state.vectorstore = get_vectorstore(text_chunks)
-                            st.success("✅ Success!")
-                        except Exception as e:
-                            st.error(f"❌ Error: {str(e)}")
+                    progress_bar = st.progress(0.0, text="Processing documents...")
+                    doc_index = st.session_state.doc_index
+                    try:
+                        with trace("process_documents", files=len(pdf_docs)) as ingest_trace:
+                            st.session_state.last_trace = ingest_trace
+                            progress = None
+                            for progress in ingest_pdfs(pdf_docs, doc_index):
+                                total = max(progress["total_pages"], 1)
+                                progress_bar.progress(
+                                    min(progress["pages"] / total, 1.0),
+                                    text=f"📄 {progress['pages']}/{progress['total_pages']} pages · "
+                                         f"🧩 {progress['chunks']} chunks indexed"
+                                )
+                        progress_bar.empty()
+                        if progress is None:
+                            st.success(f"✅ All {len(doc_index)} documents already indexed")
+                        elif doc_index.vectorstore is None:
+                            st.warning("⚠️ No text found in the uploaded PDFs")
+                        else:
+                            st.success(f"✅ Indexed {progress['documents']} new documents")
+                            if progress["duplicates"]:
+                                st.caption(f"🧹 Skipped {progress['duplicates']} duplicate chunks")
+                            index_info = doc_index.index_info()
+                            params = ", ".join(f"{k}={v}" for k, v in index_info["params"].items())
+                            st.caption(
+                                f"Vector index: {index_info['kind']} ({index_info['storage']}) over {index_info['vectors']} chunks"
+                                + (f" ({params})" if params else "")
+                            )
+                        cache_stats = get_pdf_cache().stats()
+                        st.caption(
+                            f"PDF cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses, "
+                            f"{cache_stats['size_mb']:.1f} of {cache_stats['max_mb']:.0f} MB used"
+                        )
+                        embed_stats = get_embedding_service().stats()
+                        if embed_stats["avg_batch_ms"] is not None:
+                            st.caption(
+                                f"Embeddings: model loaded in {embed_stats['load_seconds']:.1f}s, "
+                                f"{embed_stats['avg_batch_ms']:.0f} ms per batch"
+                            )
+                        if embed_stats["cache"] is not None:
+                            st.caption(
+                                f"Embedding cache: {embed_stats['cache']['hit_rate']:.0%} hit rate, "
+                                f"{embed_stats['cache']['entries']} vectors "
+                                f"({embed_stats['cache']['size_mb']:.1f} of {embed_stats['cache']['max_mb']:.0f} MB)"
+                            )
+                    except Exception as e:
+                        progress_bar.empty()
+                        st.error(f"❌ Error: {str(e)}")
                 else:
                     st.warning("⚠️ Upload PDFs first")
         
         with col2:
             if st.button("🗑️ Clear", use_container_width=True):
                 st.session_state.messages = []
-                st.session_state.message_store = {}
+                st.session_state.pop("conversation", None)
                 st.session_state.chat_history = []
-                st.session_state.vectorstore = None
+                st.session_state.doc_index = get_document_index()
                 st.rerun()
 
+        # Saved indexes survive refreshes and restarts, and are shared read-only
+        with st.expander("💾 Saved Indexes", expanded=False):
+            index_name = st.text_input("Index name", placeholder="e.g. employee-handbook")
+            if st.button("Save current index", use_container_width=True):
+                if not index_name:
+                    st.warning("⚠️ Please enter a name.")
+                elif st.session_state.doc_index.vectorstore is None:
+                    st.warning("⚠️ Process some documents first.")
+                else:
+                    save_index(index_name, st.session_state.doc_index)
+                    st.success(f"✅ Saved as '{index_name}'")
+            
+            saved_indexes = list_indexes()
+            if saved_indexes:
+                selected_index = st.selectbox("Saved indexes", options=saved_indexes)
+                if st.button("Load index", use_container_width=True):
+                    try:
+                        doc_index = load_index(selected_index, get_embedding_service())
+                        st.session_state.doc_index = doc_index
+                        st.success(
+                            f"✅ Loaded {len(doc_index)} documents, {doc_index.chunk_count} chunks "
+                            f"in {doc_index.load_seconds * 1000:.0f} ms"
+                        )
+                    except Exception as e:
+                        st.error(f"❌ Error: {str(e)}")
+
         # URL Summarization
         with st.expander("🔗 Summarize URL Content", expanded=False):
             url_input = st.text_input(
@@ -376,6 +436,10 @@ def show_chat_interface():
                     ["concise", "detailed", "bullet_points"],
                     help="Choose the type of summary"
                 )
+            refresh_summary = st.checkbox(
+                "Ignore cached summary",
+                help="Fetch and summarize the content again instead of reusing an earlier summary"
+            )
             
             if st.button("📝 Generate Summary", use_container_width=True):
                 if not st.session_state.groq_api_key:
@@ -385,54 +449,64 @@ def show_chat_interface():
                 else:
                     with st.spinner("Processing content..."):
                         try:
-                            if content_type == "YouTube Video":
-                                video_id = get_youtube_id(url_input)
-                                if not video_id:
-                                    st.error("Invalid YouTube URL")
-                                    return
+                            with trace("summarize_url", content_type=content_type) as url_trace:
+                                st.session_state.last_trace = url_trace
+                                if content_type == "YouTube Video":
+                                    video_id = get_youtube_id(url_input)
+                                    if not video_id:
+                                        st.error("Invalid YouTube URL")
+                                        return
                                 
-                                transcript = get_youtube_transcript(video_id)
-                                if not transcript:
-                                    st.error("Could not get video transcript")
-                                    return
+                                    def fetch_transcript():
+                                        transcript = get_youtube_transcript(video_id)
+                                        if not transcript:
+                                            st.error("Could not get video transcript")
+                                        return transcript
                                 
-                                summary = summarize_text(transcript, "video")
-                                if summary:
-                                    st.markdown("### Video Summary")
-                                    st.markdown(summary)
+                                    summary = summarize_content(
+                                        f"youtube:{video_id}", fetch_transcript,
+                                        f"{summary_type.replace('_', ' ')} video", refresh_summary
+                                    )
+                                    if summary:
+                                        st.markdown("### Video Summary")
+                                        st.markdown(summary)
                                     
-                                    # Add to chat history
-                                    st.session_state.messages.append({
-                                        "role": "user",
-                                        "content": f"Please summarize this YouTube video: {url_input}"
-                                    })
-                                    st.session_state.messages.append({
-                                        "role": "assistant",
-                                        "content": f"Here's a summary of the video:\n\n{summary}"
-                                    })
-                                    st.rerun()
+                                        # Add to chat history
+                                        st.session_state.messages.append({
+                                            "role": "user",
+                                            "content": f"Please summarize this YouTube video: {url_input}"
+                                        })
+                                        st.session_state.messages.append({
+                                            "role": "assistant",
+                                            "content": f"Here's a summary of the video:\n\n{summary}"
+                                        })
+                                        st.rerun()
                             
-                            else:  # Website
-                                content = get_website_content(url_input)
-                                if not content:
-                                    st.error("Could not fetch website content")
-                                    return
+                                else:  # Website
+                                    def fetch_content():
+                                        content = get_website_content(url_input, refresh=refresh_summary)
+                                        if not content:
+                                            st.error("Could not fetch website content")
+                                        return content
                                 
-                                summary = summarize_text(content, "article")
-                                if summary:
-                                    st.markdown("### Article Summary")
-                                    st.markdown(summary)
+                                    summary = summarize_content(
+                                        url_input.strip(), fetch_content,
+                                        f"{summary_type.replace('_', ' ')} article", refresh_summary
+                                    )
+                                    if summary:
+                                        st.markdown("### Article Summary")
+                                        st.markdown(summary)
                                     
-                                    # Add to chat history
-                                    st.session_state.messages.append({
-                                        "role": "user",
-                                        "content": f"Please summarize this article: {url_input}"
-                                    })
-                                    st.session_state.messages.append({
-                                        "role": "assistant",
-                                        "content": f"Here's a summary of the article:\n\n{summary}"
-                                    })
-                                    st.rerun()
+                                        # Add to chat history
+                                        st.session_state.messages.append({
+                                            "role": "user",
+                                            "content": f"Please summarize this article: {url_input}"
+                                        })
+                                        st.session_state.messages.append({
+                                            "role": "assistant",
+                                            "content": f"Here's a summary of the article:\n\n{summary}"
+                                        })
+                                        st.rerun()
                         
                         except Exception as e:
                             st.error(f"Error processing URL: {str(e)}")
@@ -444,9 +518,6 @@ def show_chat_interface():
             </div>
         """, unsafe_allow_html=True)
 
-    # Store selected model ID in session state
-    st.session_state.selected_model_id = GROQ_MODELS[selected_model]['id']
-
     # Main chat interface
     st.title("💬 Chat Interface")
 
@@ -467,51 +538,82 @@ def show_chat_interface():
             with st.chat_message("user"):
                 st.markdown(prompt)
             
-            # Generate response
+            # Generate response, streamed into the message as it is written
             with st.chat_message("assistant"):
-                with st.spinner("🤔 Thinking..."):
-                    try:
-                        if st.session_state.vectorstore:
-                            conversation = get_conversation_chain(st.session_state.vectorstore)
-                            chat_history = [(st.session_state.messages[i]["content"], 
-                                           st.session_state.messages[i+1]["content"]) 
-                                          for i in range(0, len(st.session_state.messages)-1, 2)]
-                            
-                            response = conversation({
-                                "question": prompt,
-                                "chat_history": chat_history
-                            })
-                            
-                            st.markdown(response["answer"])
+                placeholder = st.empty()
+                placeholder.markdown("🤔 Thinking...")
+                try:
+                    # Read from the index on every turn: ingestion, removals and rollbacks replace it
+                    vectorstore = st.session_state.doc_index.vectorstore
+                    with trace("chat_turn", rag=vectorstore is not None) as turn_trace:
+                        st.session_state.last_trace = turn_trace
+                        turn_start = time.perf_counter()
+                        stream = TokenStream(placeholder, turn_start)
+                        if vectorstore is not None:
+                            conversation = get_conversation_chain(
+                                vectorstore,
+                                retriever_factory=st.session_state.doc_index.as_retriever
+                            )
+                            chat_history, prompt_tokens = get_history(prompt, rag=True)
+                        
+                            response = answer_with_sources(
+                                conversation, prompt, chat_history, language,
+                                callbacks=[AnswerStreamHandler(stream)]
+                            )
+                            stream.finish()
+                            answer = response["answer"]
+                            cached = response["cached"]
+                            if not stream.text:
+                                placeholder.markdown(answer)
                             if "source_documents" in response:
+                                prompt_tokens += sum(count_tokens(doc.page_content) for doc in response["source_documents"])
                                 with st.expander("📚 Source Documents"):
                                     for i, doc in enumerate(response["source_documents"], 1):
                                         st.markdown(f"**Source {i}:**")
                                         st.markdown(doc.page_content)
                         else:
                             chain = initialize_chain()
-                            response = chain.invoke(
-                                {"messages": [{"role": "user", "content": prompt}],
-                                 "language": language},
-                                {"configurable": {"session_id": "streamlit_chat"}}
-                            )
-                            st.markdown(response.content)
-                        
+                            history, prompt_tokens = get_history(prompt, rag=False)
+                            answer, cached = stream_chat_answer(chain, prompt, history, language, stream)
+                    
                         # Add assistant response to history
                         st.session_state.messages.append({
                             "role": "assistant",
-                            "content": response["answer"] if st.session_state.vectorstore else response.content
+                            "content": answer
                         })
-                    
-                    except Exception as e:
-                        st.error(f"❌ Error: {str(e)}")
+
+                        # Chain setup is paid once per model/key/index; later turns reuse it
+                        setup = st.session_state.chain_setup
+                        elapsed = time.perf_counter() - turn_start
+                        st.session_state.last_turn = {
+                            "setup_ms": setup["ms"], "chain_reused": setup["reused"],
+                            "first_token_s": stream.first_token_s, "total_s": elapsed,
+                            "prompt_tokens": prompt_tokens, "cached": cached is not None
+                        }
+                        record(prompt_tokens=prompt_tokens)
+                        if cached:
+                            cache_stats = get_response_cache().stats()
+                            st.caption(
+                                f"⚡ Cached answer in {elapsed:.2f}s, saved ~{cached['latency_s']:.1f}s · "
+                                f"cache hit rate {cache_stats['hit_rate']:.0%}"
+                            )
+                        else:
+                            first_token = f"first token {stream.first_token_s:.2f}s · " if stream.first_token_s else ""
+                            st.caption(
+                                f"⏱️ Chain {'reused' if setup['reused'] else 'built'} in {setup['ms']:.1f} ms · "
+                                f"{first_token}answered in {elapsed:.1f}s · {prompt_tokens} prompt tokens"
+                            )
+                
+                except Exception as e:
+                    placeholder.empty()
+                    st.error(f"❌ Error: {str(e)}")
+
+    show_trace_panel()
 
 if __name__ == "__main__":
     # Initialize session state
-    if "message_store" not in st.session_state:
-        st.session_state.message_store = {}
-    if "vectorstore" not in st.session_state:
-        st.session_state.vectorstore = None
+    if "doc_index" not in st.session_state:
+        st.session_state.doc_index = get_document_index()
     if "messages" not in st.session_state:
         st.session_state.messages = []
     if "chat_history" not in st.session_state:
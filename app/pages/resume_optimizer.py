@@ -12,8 +12,9 @@ current_dir = Path(__file__).resolve().parent.parent
 if str(current_dir) not in sys.path:
     sys.path.append(str(current_dir))
 
-from config import GROQ_MODELS
+from config import DEBUG_PANEL, GROQ_MODELS
 from utils.resume_processor import ResumeOptimizer
+from utils.tracing import trace, waterfall
 
 def check_api_key():
     """Check if API key is available and valid"""
@@ -170,11 +171,15 @@ def show_resume_optimizer():
                     output_path = input_path.replace('.docx', '_optimized.docx')
                     
                     # Process the resume
-                    success = optimizer.process_resume(
-                        input_path,
-                        job_description,
-                        output_path
-                    )
+                    with trace("optimize_resume") as resume_trace:
+                        success = optimizer.process_resume(
+                            input_path,
+                            job_description,
+                            output_path
+                        )
+                    if DEBUG_PANEL:
+                        with st.expander("🔍 Debug: stage timings", expanded=False):
+                            st.code(waterfall(resume_trace), language=None)
                     
                     if success:
                         # Read the optimized file
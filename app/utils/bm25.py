@@ -0,0 +1,148 @@
+import math
+import re
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from config import BM25_B, BM25_K1
+
+# Words, plus identifiers joined by - . / such as part numbers and versions
+_TOKEN_RE = re.compile(r"\w+(?:[-./]\w+)*")
+_PART_RE = re.compile(r"\w+")
+# Terms in more than this share of chunks (the, and, of...) carry little
+# weight but the longest postings, so they are skipped when a query has
+# rarer terms to rank by
+_COMMON_TERM_FRACTION = 0.5
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words; compound identifiers are kept whole as well as split into parts"""
+    tokens = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = match.group()
+        tokens.append(token)
+        if len(token) > 1 and not token.isalnum():
+            tokens.extend(part for part in _PART_RE.findall(token) if part != token)
+    return tokens
+
+
+class BM25Index:
+    """In-memory inverted index with BM25 scoring over docstore ids
+
+    Postings are kept in compact arrays and scored with numpy, so a query
+    costs a few vector operations per query term rather than a Python loop
+    over every matching chunk.
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self._terms: Dict[str, int] = {}
+        self._postings_docs: List[array] = []
+        self._postings_tfs: List[array] = []
+        self._df = array("i")
+        self._doc_ids: List[str] = []
+        self._doc_nums: Dict[str, int] = {}
+        self._doc_terms: List[np.ndarray] = []
+        self._lengths = array("i")
+        self._alive = bytearray()
+        self._total_length = 0
+        self._dead = 0
+        # Per-chunk length normalisation, recomputed after the index changes
+        self._norm = None
+
+    def __len__(self) -> int:
+        return len(self._doc_nums)
+
+    def add(self, doc_ids: Iterable[str], texts: Iterable[str]) -> None:
+        """Index chunks under their docstore ids"""
+        for doc_id, text in zip(doc_ids, texts):
+            if doc_id in self._doc_nums:
+                continue
+            num = len(self._doc_ids)
+            counts: Dict[int, int] = {}
+            tokens = tokenize(text)
+            for token in tokens:
+                term = self._terms.get(token)
+                if term is None:
+                    term = self._terms[token] = len(self._postings_docs)
+                    self._postings_docs.append(array("i"))
+                    self._postings_tfs.append(array("f"))
+                    self._df.append(0)
+                counts[term] = counts.get(term, 0) + 1
+            for term, tf in counts.items():
+                self._postings_docs[term].append(num)
+                self._postings_tfs[term].append(tf)
+                self._df[term] += 1
+            self._doc_ids.append(doc_id)
+            self._doc_nums[doc_id] = num
+            self._doc_terms.append(np.fromiter(counts, dtype=np.int32, count=len(counts)))
+            self._lengths.append(len(tokens))
+            self._alive.append(1)
+            self._total_length += len(tokens)
+        self._norm = None
+
+    def remove(self, doc_ids: Iterable[str]) -> None:
+        """Drop chunks from scoring; their postings are purged once they make up half the index"""
+        for doc_id in doc_ids:
+            num = self._doc_nums.pop(doc_id, None)
+            if num is None:
+                continue
+            self._alive[num] = 0
+            self._total_length -= self._lengths[num]
+            for term in self._doc_terms[num]:
+                self._df[term] -= 1
+            self._doc_terms[num] = None
+            self._dead += 1
+        self._norm = None
+        if self._dead and self._dead >= len(self._doc_nums):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Renumber live chunks and rewrite postings without removed ones"""
+        alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+        remap = np.full(len(alive), -1, dtype=np.int32)
+        remap[alive] = np.arange(int(alive.sum()), dtype=np.int32)
+        for term in range(len(self._postings_docs)):
+            docs = np.frombuffer(self._postings_docs[term], dtype=np.int32)
+            keep = remap[docs] >= 0 if len(docs) else np.zeros(0, dtype=bool)
+            self._postings_docs[term] = array("i", remap[docs][keep].tobytes())
+            self._postings_tfs[term] = array("f", np.frombuffer(self._postings_tfs[term], dtype=np.float32)[keep].tobytes())
+        live = np.flatnonzero(alive)
+        self._doc_ids = [self._doc_ids[num] for num in live]
+        self._doc_nums = {doc_id: num for num, doc_id in enumerate(self._doc_ids)}
+        self._doc_terms = [self._doc_terms[num] for num in live]
+        self._lengths = array("i", np.frombuffer(self._lengths, dtype=np.int32)[live].tobytes())
+        self._alive = bytearray(b"\x01" * len(live))
+        self._dead = 0
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Top k (docstore id, BM25 score) pairs for a query"""
+        n_docs = len(self._doc_nums)
+        terms = {self._terms[token] for token in tokenize(query) if token in self._terms}
+        terms = {term for term in terms if self._df[term]}  # drop terms of removed chunks
+        if not terms or not n_docs:
+            return []
+        rare = {term for term in terms if self._df[term] <= n_docs * _COMMON_TERM_FRACTION}
+        if rare:
+            terms = rare
+        if self._norm is None:
+            lengths = np.frombuffer(self._lengths, dtype=np.int32)
+            avg_length = self._total_length / n_docs
+            self._norm = (self.k1 * (1 - self.b + self.b * lengths / avg_length)).astype(np.float32)
+        norm = self._norm
+        scores = np.zeros(len(self._doc_ids), dtype=np.float32)
+        for term in terms:
+            df = self._df[term]
+            docs = np.frombuffer(self._postings_docs[term], dtype=np.int32)
+            tfs = np.frombuffer(self._postings_tfs[term], dtype=np.float32)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            scores[docs] += (idf * (self.k1 + 1)) * tfs / (tfs + norm[docs])
+        if self._dead:
+            scores[np.frombuffer(self._alive, dtype=np.uint8) == 0] = 0
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self._doc_ids[num], float(scores[num])) for num in candidates]
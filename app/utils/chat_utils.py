@@ -1,79 +1,305 @@
 import streamlit as st
-from PyPDF2 import PdfReader
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage
+import time
+from functools import partial
+from itertools import groupby
+from operator import itemgetter
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import get_buffer_string
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_community.chat_message_histories import ChatMessageHistory
-from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain.chains import ConversationalRetrievalChain
 
-def get_pdf_text(pdf_docs):
-    """Extract text from PDF documents"""
-    text = ""
-    for pdf in pdf_docs:
-        pdf_reader = PdfReader(pdf)
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-    return text
-
-def get_text_chunks(text):
-    """Split text into chunks"""
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len
-    )
+from config import (
+    CHUNK_BUFFER_CHARS,
+    DEDUP_ENABLED,
+    EMBED_BATCH_SIZE,
+    PROMPT_OVERHEAD_TOKENS,
+    RESPONSE_CACHE_ENABLED,
+    RETRIEVER_K,
+)
+from utils.conversation import ConversationContext, history_budget
+from utils.dedup import ChunkDeduplicator
+from utils.embeddings import get_embedding_service
+from utils.ingest import iter_batches, iter_text_chunks
+from utils.llm_client import get_chat_model
+from utils.pdf_extractor import iter_document_pages, read_pdf_bytes
+from utils.response_cache import fingerprint, get_response_cache
+from utils.text_chunker import count_tokens, get_chunker, rag_chunk_sizes
+from utils.tracing import span, traced_iter
+from utils.vector_index import DocumentIndex, document_key
+
+def get_text_chunks(text, model_id=None):
+    """Split text into token-sized chunks for the selected model"""
+    model_id = model_id or st.session_state.get("selected_model_id")
+    text_splitter = get_chunker(*rag_chunk_sizes(model_id))
     chunks = text_splitter.split_text(text)
     return chunks
 
-def get_vectorstore(text_chunks):
-    """Create vector store from text chunks"""
-    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-    vectorstore = FAISS.from_texts(texts=text_chunks, embedding=embeddings)
-    return vectorstore
-
-def get_conversation_chain(vectorstore):
-    """Create conversation chain with RAG"""
-    llm = ChatGroq(
-        model="mixtral-8x7b-32768",
-        groq_api_key=st.session_state.groq_api_key,
-        temperature=0.7
-    )
-    
-    conversation_chain = ConversationalRetrievalChain.from_llm(
-        llm=llm,
-        retriever=vectorstore.as_retriever(),
-        return_source_documents=True,
-        verbose=True
-    )
-    
-    return conversation_chain
-
-def get_session_history(session_id: str):
-    """Get or create chat history for a session"""
-    if session_id not in st.session_state.message_store:
-        st.session_state.message_store[session_id] = ChatMessageHistory()
-    return st.session_state.message_store[session_id]
-
-def initialize_chain():
-    """Initialize the chat model and chain"""
-    model = ChatGroq(
-        model="mixtral-8x7b-32768",
-        groq_api_key=st.session_state.groq_api_key
-    )
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a helpful assistant. Answer all questions to the best of your ability in {language}. If the question is about a PDF document, use the provided context to answer accurately."),
-        MessagesPlaceholder(variable_name="messages")
-    ])
-    
-    chain = prompt | model
-    
-    return RunnableWithMessageHistory(
-        chain,
-        get_session_history,
-        input_messages_key="messages"
-    )
\ No newline at end of file
+def get_embeddings():
+    """Get the shared embedding model used for the vector store"""
+    return get_embedding_service()
+
+def get_upload_key(pdf):
+    """Content hash of an uploaded file, computed once per upload"""
+    file_id = getattr(pdf, "file_id", None)
+    upload_keys = st.session_state.setdefault("upload_keys", {})
+    if file_id is None:
+        return document_key(read_pdf_bytes(pdf))
+    if file_id not in upload_keys:
+        upload_keys[file_id] = document_key(read_pdf_bytes(pdf))
+    return upload_keys[file_id]
+
+def get_document_index():
+    """Create an empty per-session document index on the shared embedding model"""
+    return DocumentIndex(get_embeddings())
+
+def ingest_pdfs(pdf_docs, doc_index, batch_size=EMBED_BATCH_SIZE):
+    """Stream new PDFs through extraction, chunking and embedding into doc_index, yielding progress after each batch"""
+    progress = {"pages": 0, "total_pages": 0, "chunks": 0, "duplicates": 0, "documents": 0}
+
+    # Files already in the index (by content hash) are skipped entirely
+    new_docs = {}
+    for pdf in pdf_docs:
+        key = get_upload_key(pdf)
+        if key not in doc_index and key not in new_docs:
+            new_docs[key] = pdf
+    if not new_docs:
+        return
+    new_docs = list(new_docs.items())
+    # Chunk sizes are recorded with each document, as the model may change before it is queried
+    model_id = st.session_state.get("selected_model_id")
+    chunk_tokens = rag_chunk_sizes(model_id)[0]
+
+    def on_total(total):
+        progress["total_pages"] = total
+
+    def count_pages(pages):
+        for page in pages:
+            progress["pages"] += 1
+            yield page
+
+    # Each stage pulls from the previous one, so at most one text buffer and
+    # one batch of chunks are held in memory besides the growing index
+    document_pages = iter_document_pages([pdf for _, pdf in new_docs], on_total=on_total)
+    for i, pages in groupby(document_pages, key=itemgetter(0)):
+        key, pdf = new_docs[i]
+        name = getattr(pdf, "name", f"document {i + 1}")
+        chunks = iter_text_chunks(
+            count_pages(page for _, page in pages), partial(get_text_chunks, model_id=model_id), CHUNK_BUFFER_CHARS
+        )
+        # Deduplicate within the document so removing one file never leaves
+        # another missing chunks that were dropped as copies of it
+        deduplicator = ChunkDeduplicator() if DEDUP_ENABLED else None
+        if deduplicator is not None:
+            chunks = deduplicator.filter(chunks)
+        # Extraction, chunking and deduplication run as chunks are pulled
+        chunks = traced_iter(chunks, "extract_and_chunk")
+        try:
+            for batch in iter_batches(chunks, batch_size):
+                with span("index", merge=True, chunks=len(batch)):
+                    doc_index.add_chunks(key, name, batch, chunk_tokens)
+                progress["chunks"] += len(batch)
+                yield progress
+        except BaseException:
+            # Don't leave a half-indexed document that would be skipped next time,
+            # including when a Streamlit rerun abandons this generator
+            doc_index.remove_document(key)
+            raise
+        # Register documents without any text too, so they aren't re-read
+        doc_index.add_chunks(key, name, [])
+        progress["documents"] += 1
+        if deduplicator is not None:
+            progress["duplicates"] += deduplicator.stats()["removed"]
+        yield progress
+
+    # Move to an approximate index once the corpus outgrows exact search
+    with span("optimize_index"):
+        optimized = doc_index.optimize()
+    if optimized:
+        yield progress
+
+DEFAULT_MODEL_ID = "mixtral-8x7b-32768"
+# Tags the LLM call that writes the answer, as opposed to question rewriting
+ANSWER_TAG = "answer"
+
+class TokenStream:
+    """Render streamed tokens into a Streamlit placeholder, timing the first one"""
+
+    def __init__(self, placeholder, start=None):
+        self.placeholder = placeholder
+        self.start = start or time.perf_counter()
+        self.text = ""
+        self.first_token_s = None
+
+    def push(self, token):
+        if not token:
+            return
+        if self.first_token_s is None:
+            self.first_token_s = time.perf_counter() - self.start
+        self.text += token
+        self.placeholder.markdown(self.text + "▌")
+
+    def consume(self, tokens):
+        """Render an iterable of tokens and return the full text"""
+        for token in tokens:
+            self.push(token)
+        return self.finish()
+
+    def finish(self):
+        self.placeholder.markdown(self.text)
+        return self.text
+
+class AnswerStreamHandler(BaseCallbackHandler):
+    """Forward tokens of the answering LLM call, and only that call, to a TokenStream"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def on_llm_new_token(self, token, *, tags=None, **kwargs):
+        if ANSWER_TAG in (tags or []):
+            self.stream.push(token)
+
+def _cached_chain(name, key, build):
+    """Reuse the session's chain while its key is unchanged, recording how long setup took"""
+    start = time.perf_counter()
+    cached = st.session_state.get(name)
+    reused = cached is not None and cached[0] == key
+    if not reused:
+        cached = (key, build())
+        st.session_state[name] = cached
+    st.session_state.chain_setup = {"ms": (time.perf_counter() - start) * 1000, "reused": reused}
+    return cached[1]
+
+def get_conversation_chain(vectorstore, retriever_factory=None, model_id=None, temperature=0.7):
+    """Create conversation chain with RAG, reused across turns until the model, key or index changes"""
+    model_id = model_id or st.session_state.get("selected_model_id") or DEFAULT_MODEL_ID
+    api_key = st.session_state.groq_api_key
+    # The cached chain references vectorstore, so its id can't be reused while cached
+    key = (model_id, api_key, id(vectorstore), temperature)
+
+    def build():
+        return ConversationalRetrievalChain.from_llm(
+            # A streaming model for the answer; rewriting follow-up questions stays unstreamed
+            llm=get_chat_model(model_id, api_key, temperature, streaming=True).with_config(tags=[ANSWER_TAG]),
+            condense_question_llm=get_chat_model(model_id, api_key, temperature),
+            retriever=retriever_factory() if retriever_factory else vectorstore.as_retriever(),
+            return_source_documents=True,
+            verbose=True
+        )
+
+    return _cached_chain("rag_chain", key, build)
+
+def get_conversation_context():
+    """Get or create the bounded history of this session's chat"""
+    if "conversation" not in st.session_state:
+        st.session_state.conversation = ConversationContext()
+    return st.session_state.conversation
+
+def get_history(question, rag, model_id=None):
+    """History messages for a new question, sized to fit the model's context; returns (messages, prompt tokens)"""
+    model_id = model_id or st.session_state.get("selected_model_id") or DEFAULT_MODEL_ID
+    earlier = st.session_state.messages[:-1] if st.session_state.messages else []
+    with span("history") as history_span:
+        # Room for RETRIEVER_K chunks of the size the documents were actually split into
+        context_tokens = RETRIEVER_K * st.session_state.doc_index.chunk_tokens if rag else 0
+        budget = history_budget(model_id, question, context_tokens)
+        history = get_conversation_context().history(earlier, model_id, st.session_state.groq_api_key, budget)
+        prompt_tokens = PROMPT_OVERHEAD_TOKENS + count_tokens(question) + sum(
+            count_tokens(message.content) for message in history
+        )
+        history_span.set(messages=len(history), budget=budget)
+    return history, prompt_tokens
+
+def initialize_chain(model_id=None, temperature=None):
+    """Initialize the chat model and chain, reused across turns until the model or key changes
+
+    The chain takes the bounded history from get_history as "history"
+    alongside the new "messages".
+    """
+    model_id = model_id or st.session_state.get("selected_model_id") or DEFAULT_MODEL_ID
+    api_key = st.session_state.groq_api_key
+
+    def build():
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", "You are a helpful assistant. Answer all questions to the best of your ability in {language}. If the question is about a PDF document, use the provided context to answer accurately."),
+            MessagesPlaceholder(variable_name="history"),
+            MessagesPlaceholder(variable_name="messages")
+        ])
+
+        return prompt | get_chat_model(model_id, api_key, temperature)
+
+    return _cached_chain("plain_chain", (model_id, api_key, None, temperature), build)
+
+def _response_cache():
+    return get_response_cache() if RESPONSE_CACHE_ENABLED else None
+
+def _cache_lookup(cache, model_id, language, context, question):
+    if cache is None:
+        return None
+    with span("response_cache") as cache_span:
+        cached = cache.get(model_id, language, context, question)
+        cache_span.set(cache_hits=int(cached is not None), cache_misses=int(cached is None))
+    return cached
+
+def answer_with_sources(conversation, question, chat_history, language, callbacks=None, model_id=None):
+    """Answer a question over the documents, reusing a cached answer for the same question and retrieved chunks
+
+    Runs the steps of the ConversationalRetrievalChain one by one so the
+    cache can be checked between retrieval and the answering call: a
+    follow-up is first rewritten into a standalone question, which is
+    what answers are cached under. Returns the chain's answer and
+    source_documents, plus the cache entry on a hit.
+    """
+    model_id = model_id or st.session_state.get("selected_model_id") or DEFAULT_MODEL_ID
+    if chat_history:
+        with span("condense_question"):
+            generator = conversation.question_generator
+            question = generator.invoke({
+                "question": question,
+                "chat_history": (conversation.get_chat_history or get_buffer_string)(chat_history)
+            })[generator.output_key]
+    with span("retrieve") as retrieve_span:
+        docs = conversation.retriever.invoke(question)
+        retrieve_span.set(documents=len(docs))
+
+    # Keyed on chunk text, so sessions that indexed the same files share answers
+    cache = _response_cache()
+    context = fingerprint(doc.page_content for doc in docs)
+    cached = _cache_lookup(cache, model_id, language, context, question)
+    if cached:
+        return {"answer": cached["answer"], "source_documents": docs, "cached": cached}
+
+    start = time.perf_counter()
+    combine = conversation.combine_docs_chain
+    with span("generate"):
+        answer = combine.invoke(
+            {"input_documents": docs, "question": question}, {"callbacks": callbacks}
+        )[combine.output_key]
+    if cache:
+        cache.put(model_id, language, context, question, answer, time.perf_counter() - start)
+    return {"answer": answer, "source_documents": docs, "cached": None}
+
+def stream_chat_answer(chain, question, history, language, stream, model_id=None):
+    """Stream a chat answer into stream, or replay a cached one for the same question and history
+
+    Returns (answer, cache entry or None).
+    """
+    model_id = model_id or st.session_state.get("selected_model_id") or DEFAULT_MODEL_ID
+    cache = _response_cache()
+    context = fingerprint(message.content for message in history)
+    cached = _cache_lookup(cache, model_id, language, context, question)
+    if cached:
+        stream.push(cached["answer"])
+        return stream.finish(), cached
+
+    start = time.perf_counter()
+    with span("generate"):
+        answer = stream.consume(
+            chunk.content for chunk in chain.stream(
+                {"history": history,
+                 "messages": [{"role": "user", "content": question}],
+                 "language": language}
+            )
+        )
+    if cache:
+        cache.put(model_id, language, context, question, answer, time.perf_counter() - start)
+    return answer, None
@@ -0,0 +1,136 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from config import (
+    ANSWER_RESERVE_FRACTION,
+    HISTORY_CONTEXT_FRACTION,
+    HISTORY_RECENT_TURNS,
+    HISTORY_SUMMARY_FRACTION,
+    PROMPT_OVERHEAD_TOKENS,
+)
+from utils.llm_client import get_chat_model
+from utils.scheduler import PRIORITY_BACKGROUND
+from utils.text_chunker import context_length_for, count_tokens, truncate_tokens
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """Update the running summary of a conversation between a user and an assistant.
+Keep names, numbers, identifiers, decisions and open questions; drop pleasantries.
+Write at most {max_words} words.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+
+Updated summary:"""
+
+# One background worker for all sessions; summaries are small and not urgent
+_summary_executor = None
+_summary_executor_lock = threading.Lock()
+
+
+def _get_summary_executor() -> ThreadPoolExecutor:
+    global _summary_executor
+    with _summary_executor_lock:
+        if _summary_executor is None:
+            _summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-summary")
+        return _summary_executor
+
+
+def message_tokens(message: Dict) -> int:
+    """Token count of a chat message dict, cached on the message"""
+    if "tokens" not in message:
+        message["tokens"] = count_tokens(message["content"])
+    return message["tokens"]
+
+
+def history_budget(model_id: Optional[str], question: str, context_tokens: int = 0) -> int:
+    """Tokens left for history once the question, context_tokens of retrieved context and answer are provided for"""
+    context_length = context_length_for(model_id)
+    reserved = (PROMPT_OVERHEAD_TOKENS + count_tokens(question) + context_tokens
+                + int(context_length * ANSWER_RESERVE_FRACTION))
+    return max(0, min(int(context_length * HISTORY_CONTEXT_FRACTION), context_length - reserved))
+
+
+def _summarize(model_id: str, api_key: str, summary: str, messages: List[Dict], max_tokens: int) -> str:
+    transcript = "\n".join(f"{message['role'].title()}: {message['content']}" for message in messages)
+    prompt = SUMMARY_PROMPT.format(
+        # Roughly three words per four tokens
+        max_words=max(20, max_tokens * 3 // 4),
+        summary=summary or "(none)",
+        # Keep the summarization prompt well inside the model's context
+        messages=truncate_tokens(transcript, max_tokens * 4),
+    )
+    response = get_chat_model(model_id, api_key, temperature=0, priority=PRIORITY_BACKGROUND).invoke(prompt)
+    return truncate_tokens(response.content.strip(), max_tokens)
+
+
+class ConversationContext:
+    """Bounded chat history: recent turns verbatim plus a rolling summary of older ones
+
+    Turns that leave the verbatim window are folded into the summary by a
+    background call, so no turn waits on summarization; until that call
+    lands the previous summary is used.
+    """
+
+    def __init__(self):
+        self.summary = ""
+        # Number of leading messages already folded into the summary
+        self.summarized = 0
+        self._pending: Optional[Future] = None
+        self._pending_upto = 0
+
+    def _collect_summary(self) -> None:
+        if self._pending is None or not self._pending.done():
+            return
+        try:
+            self.summary = self._pending.result()
+            self.summarized = self._pending_upto
+        except Exception as e:
+            # Keep the old summary; the same turns are retried next time
+            logger.warning("History summarization failed: %s", e)
+        self._pending = None
+
+    def history(self, messages: List[Dict], model_id: str, api_key: str, budget: int) -> List[BaseMessage]:
+        """History messages for the next prompt, within budget tokens
+
+        messages are the earlier chat messages, without the new question.
+        """
+        self._collect_summary()
+        summary_budget = int(budget * HISTORY_SUMMARY_FRACTION)
+        summary = truncate_tokens(self.summary, summary_budget) if self.summary else ""
+        remaining = budget - (count_tokens(summary) if summary else 0)
+
+        # Walk back from the newest message while it fits, up to HISTORY_RECENT_TURNS user turns
+        start = len(messages)
+        turns = 0
+        while start > 0 and turns < HISTORY_RECENT_TURNS:
+            message = messages[start - 1]
+            cost = message_tokens(message)
+            if cost > remaining:
+                break
+            remaining -= cost
+            start -= 1
+            turns += message["role"] == "user"
+        recent = messages[start:]
+
+        older = messages[self.summarized:start]
+        if older and self._pending is None and summary_budget > 0:
+            self._pending = _get_summary_executor().submit(
+                _summarize, model_id, api_key, self.summary, older, summary_budget
+            )
+            self._pending_upto = start
+
+        history: List[BaseMessage] = []
+        if summary:
+            history.append(SystemMessage(content=f"Summary of the earlier conversation: {summary}"))
+        for message in recent:
+            cls = HumanMessage if message["role"] == "user" else AIMessage
+            history.append(cls(content=message["content"]))
+        return history
@@ -0,0 +1,96 @@
+import hashlib
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+
+from config import DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_SHINGLE_SIZE, DEDUP_THRESHOLD
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD_RE = re.compile(r"\w+")
+
+
+class ChunkDeduplicator:
+    """Drop exact and near-duplicate chunks using content hashes and MinHash LSH"""
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_perm: int = DEDUP_NUM_PERM,
+                 bands: int = DEDUP_BANDS, shingle_size: int = DEDUP_SHINGLE_SIZE, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        # Coefficients stay below 2**32 so a * hash + b cannot overflow uint64
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._exact = set()
+        self._buckets = [defaultdict(list) for _ in range(bands)]
+        self._signatures = []
+        self.exact_removed = 0
+        self.near_removed = 0
+        self.kept = 0
+
+    def _normalize(self, text: str) -> List[str]:
+        return _WORD_RE.findall(text.lower())
+
+    def _signature(self, words: List[str]) -> np.ndarray:
+        size = self.shingle_size
+        if len(words) <= size:
+            shingles = {" ".join(words)}
+        else:
+            shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "little")
+             for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+    def is_duplicate(self, chunk: str) -> bool:
+        """Check a chunk against everything seen so far and remember it if new"""
+        words = self._normalize(chunk)
+        exact_key = hashlib.sha1(" ".join(words).encode()).digest()
+        if exact_key in self._exact:
+            self.exact_removed += 1
+            return True
+
+        signature = self._signature(words)
+        band_keys = [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+        candidates = set()
+        for band, key in enumerate(band_keys):
+            candidates.update(self._buckets[band].get(key, ()))
+        for candidate in candidates:
+            similarity = np.count_nonzero(self._signatures[candidate] == signature) / self.num_perm
+            if similarity >= self.threshold:
+                self.near_removed += 1
+                return True
+
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        for band, key in enumerate(band_keys):
+            self._buckets[band][key].append(index)
+        self._exact.add(exact_key)
+        self.kept += 1
+        return False
+
+    def filter(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Yield only chunks that are not duplicates of earlier ones"""
+        for chunk in chunks:
+            if not self.is_duplicate(chunk):
+                yield chunk
+
+    def stats(self) -> Dict[str, int]:
+        """Counts of kept and removed chunks"""
+        return {
+            "kept": self.kept,
+            "exact_removed": self.exact_removed,
+            "near_removed": self.near_removed,
+            "removed": self.exact_removed + self.near_removed,
+        }
@@ -0,0 +1,37 @@
+import os
+from typing import List, Tuple
+
+
+def touch(path: str) -> None:
+    """Mark a cached file as just used; its modification time is its LRU timestamp"""
+    os.utime(path)
+
+
+def scan(directory: str, suffix: str) -> List[Tuple[float, int, str]]:
+    """(last used, size, path) of each cached file in directory with the suffix"""
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(suffix):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    return entries
+
+
+def evict(directory: str, suffix: str, max_bytes: int) -> int:
+    """Delete the least recently used files until the rest fit in max_bytes; returns how many went"""
+    entries = scan(directory, suffix)
+    total = sum(size for _, size, _ in entries)
+    evicted = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        evicted += 1
+    return evicted
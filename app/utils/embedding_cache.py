@@ -0,0 +1,182 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+_IN_BATCH = 500
+
+
+class EmbeddingCache:
+    """Persistent embedding cache: SQLite maps chunk hashes to rows of a memory-mapped float32 array"""
+
+    def __init__(self, directory: str, model_name: str, max_bytes: int):
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.directory = os.path.join(directory, re.sub(r"[^\w.-]", "_", model_name))
+        os.makedirs(self.directory, exist_ok=True)
+        self._vectors_path = os.path.join(self.directory, "vectors.f32")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(self.directory, "index.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, slot INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS free_slots (slot INTEGER PRIMARY KEY)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._db.commit()
+        self.dim = self._meta("dim")
+        self._vectors = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _meta(self, name: str) -> Optional[int]:
+        row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name: str, value: int) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    def key_for(self, text: str) -> str:
+        """Hash a chunk together with the model name"""
+        digest = hashlib.sha256(self.model_name.encode())
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    @property
+    def max_entries(self) -> int:
+        return max(1, self.max_bytes // (self.dim * 4)) if self.dim else 0
+
+    def _open_vectors(self, min_rows: int) -> np.memmap:
+        """Map the vector file, growing it geometrically when more rows are needed"""
+        rows = os.path.getsize(self._vectors_path) // (self.dim * 4) if os.path.exists(self._vectors_path) else 0
+        if self._vectors is not None and self._vectors.shape[0] >= min_rows:
+            return self._vectors
+        if rows < min_rows:
+            rows = max(min_rows, rows * 2, 1024)
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._vectors = None
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(rows * self.dim * 4)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dim))
+        return self._vectors
+
+    def get_many(self, texts: Sequence[str], record_stats: bool = True) -> List[Optional[np.ndarray]]:
+        """Return the cached vector for each text, or None where it is missing"""
+        keys = [self.key_for(text) for text in texts]
+        return self.get_by_keys(keys, record_stats)
+
+    def get_by_keys(self, keys: Sequence[str], record_stats: bool = True) -> List[Optional[np.ndarray]]:
+        """Return the cached vector for each key, or None where it is missing
+
+        Lookups made with record_stats=False, such as search-time rescoring,
+        are left out of the hit rate, which tracks embedding work saved.
+        """
+        results = [None] * len(keys)
+        with self._lock:
+            if self.dim is None:
+                if record_stats:
+                    self.misses += len(keys)
+                return results
+            slots = {}
+            for i in range(0, len(keys), _IN_BATCH):
+                batch = keys[i:i + _IN_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                slots.update(self._db.execute(
+                    f"SELECT key, slot FROM entries WHERE key IN ({placeholders})", batch
+                ).fetchall())
+            if slots:
+                vectors = self._open_vectors(max(slots.values()) + 1)
+                for i, key in enumerate(keys):
+                    slot = slots.get(key)
+                    if slot is not None:
+                        results[i] = np.array(vectors[slot])
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE entries SET last_used = ? WHERE key = ?", [(now, key) for key in slots]
+                )
+                self._db.commit()
+            if record_stats:
+                hits = sum(1 for vector in results if vector is not None)
+                self.hits += hits
+                self.misses += len(keys) - hits
+        return results
+
+    def put_many(self, texts: Sequence[str], vectors) -> None:
+        """Store vectors for texts, evicting least recently used entries over the size cap"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(texts):
+            return
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                self._set_meta("dim", self.dim)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+
+            new = {}
+            for text, vector in zip(texts, vectors):
+                key = self.key_for(text)
+                if key not in new and not self._db.execute(
+                    "SELECT 1 FROM entries WHERE key = ?", (key,)
+                ).fetchone():
+                    new[key] = vector
+            if not new:
+                return
+
+            # Reuse slots freed by eviction before appending to the file
+            free = [row[0] for row in self._db.execute(
+                "SELECT slot FROM free_slots ORDER BY slot LIMIT ?", (len(new),)
+            )]
+            self._db.executemany("DELETE FROM free_slots WHERE slot = ?", [(slot,) for slot in free])
+            next_slot = self._meta("next_slot") or 0
+            extra = len(new) - len(free)
+            slots = free + list(range(next_slot, next_slot + extra))
+            self._set_meta("next_slot", next_slot + extra)
+
+            storage = self._open_vectors(max(slots) + 1)
+            for slot, vector in zip(slots, new.values()):
+                storage[slot] = vector
+            storage.flush()
+            now = time.time()
+            self._db.executemany(
+                "INSERT INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+                [(key, slot, now) for key, slot in zip(new, slots)]
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self) -> None:
+        count = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        oldest = self._db.execute(
+            "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?", (excess,)
+        ).fetchall()
+        self._db.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in oldest])
+        self._db.executemany("INSERT OR IGNORE INTO free_slots (slot) VALUES (?)", [(slot,) for _, slot in oldest])
+        self.evictions += len(oldest)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit rate and current size"""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+                "size_mb": entries * (self.dim or 0) * 4 / (1024 * 1024),
+                "max_mb": self.max_bytes / (1024 * 1024),
+            }
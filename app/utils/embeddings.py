@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+from config import EMBEDDING_MODEL, EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_ENABLED, EMBEDDING_CACHE_MAX_MB
+from utils.embedding_cache import EmbeddingCache
+from utils.tracing import span
+
+
+class EmbeddingService(Embeddings):
+    """Process-wide embedding model shared by every Streamlit session"""
+
+    def __init__(self, model_name: str, cache: Optional[EmbeddingCache] = None):
+        self.model_name = model_name
+        self.cache = cache
+        self.load_seconds = None
+        self._model = None
+        self._load_lock = threading.Lock()
+        # The model already parallelises each batch across cores, so running
+        # sessions one batch at a time avoids oversubscribing the CPU
+        self._encode_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batch_seconds = deque(maxlen=100)
+        self.batches = 0
+        self.texts = 0
+
+    def load(self) -> HuggingFaceEmbeddings:
+        """Load the model weights once; later calls return the loaded model"""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    start = time.perf_counter()
+                    self._model = HuggingFaceEmbeddings(model_name=self.model_name)
+                    self.load_seconds = time.perf_counter() - start
+        return self._model
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def _timed(self, fn, texts):
+        model = self.load()
+        with self._encode_lock:
+            start = time.perf_counter()
+            result = fn(model, texts)
+            elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self._batch_seconds.append(elapsed)
+            self.batches += 1
+            self.texts += len(texts) if isinstance(texts, list) else 1
+        return result
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of chunks, encoding only those missing from the cache"""
+        if not texts:
+            return []
+        with span("embed", merge=True) as embed_span:
+            return self._embed_documents(texts, embed_span)
+
+    def _embed_documents(self, texts, embed_span):
+        if self.cache is None:
+            embed_span.set(cache_misses=len(texts))
+            return self._timed(lambda model, batch: model.embed_documents(batch), texts)
+
+        vectors = self.cache.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        embed_span.set(cache_hits=len(texts) - len(missing), cache_misses=len(missing))
+        if missing:
+            batch = [texts[i] for i in missing]
+            encoded = self._timed(lambda model, chunks: model.embed_documents(chunks), batch)
+            self.cache.put_many(batch, encoded)
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+        return [vector.tolist() if hasattr(vector, "tolist") else vector for vector in vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a search query"""
+        with span("embed_query"):
+            return self._timed(lambda model, query: model.embed_query(query), text)
+
+    def stats(self) -> Dict[str, float]:
+        """Load time and recent per-batch latency"""
+        with self._stats_lock:
+            recent = list(self._batch_seconds)
+        return {
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "model": self.model_name,
+            "loaded": self.loaded,
+            "load_seconds": self.load_seconds,
+            "batches": self.batches,
+            "texts": self.texts,
+            "last_batch_ms": recent[-1] * 1000 if recent else None,
+            "avg_batch_ms": sum(recent) / len(recent) * 1000 if recent else None,
+        }
+
+
+_service = None
+_service_lock = threading.Lock()
+_warmup_thread = None
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Return the process-wide embedding service"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            cache = None
+            if EMBEDDING_CACHE_ENABLED:
+                cache = EmbeddingCache(
+                    EMBEDDING_CACHE_DIR, EMBEDDING_MODEL, int(EMBEDDING_CACHE_MAX_MB * 1024 * 1024)
+                )
+            _service = EmbeddingService(EMBEDDING_MODEL, cache)
+        return _service
+
+
+def warm_up_embeddings() -> threading.Thread:
+    """Load the embedding model in the background so the first Process click doesn't wait"""
+    global _warmup_thread
+    service = get_embedding_service()
+    with _service_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=service.load, name="embedding-warmup", daemon=True)
+            _warmup_thread.start()
+        return _warmup_thread
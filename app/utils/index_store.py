@@ -0,0 +1,149 @@
+import json
+import os
+import pickle
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, List, Union
+
+import faiss
+from langchain_community.docstore.base import Docstore
+from langchain_core.documents import Document
+
+from config import INDEX_STORE_DIR
+from utils.vector_index import DocumentIndex, RescoringFAISS
+
+# Map IndexFlatCodes storage straight from the file (faiss 1.8+)
+_MMAP_FLAGS = faiss.IO_FLAG_MMAP_IFC
+
+# name -> (snapshot mtime, shared read-only vectorstore, documents, keyword index, load seconds)
+_loaded: Dict[str, tuple] = {}
+_loaded_lock = threading.Lock()
+
+
+class SqliteDocstore(Docstore):
+    """Read-only docstore that looks chunks up in a snapshot's SQLite file on demand"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+    @staticmethod
+    def write(path: str, docs: Dict[str, Document]) -> None:
+        db = sqlite3.connect(path)
+        db.execute("CREATE TABLE docs (id TEXT PRIMARY KEY, page_content TEXT, metadata TEXT)")
+        db.executemany(
+            "INSERT INTO docs VALUES (?, ?, ?)",
+            ((doc_id, doc.page_content, json.dumps(doc.metadata)) for doc_id, doc in docs.items())
+        )
+        db.commit()
+        db.close()
+
+    def search(self, search: str) -> Union[str, Document]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT page_content, metadata FROM docs WHERE id = ?", (search,)
+            ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=row[0], metadata=json.loads(row[1]))
+
+    def to_dict(self) -> Dict[str, Document]:
+        """Read every chunk, for making a private, writable copy"""
+        with self._lock:
+            rows = self._db.execute("SELECT id, page_content, metadata FROM docs").fetchall()
+        return {
+            doc_id: Document(id=doc_id, page_content=content, metadata=json.loads(metadata))
+            for doc_id, content, metadata in rows
+        }
+
+
+def _docstore_dict(docstore) -> Dict[str, Document]:
+    return docstore.to_dict() if isinstance(docstore, SqliteDocstore) else dict(docstore._dict)
+
+
+def _snapshot_dir(name: str) -> str:
+    return os.path.join(INDEX_STORE_DIR, re.sub(r"[^\w.-]", "_", name.strip()))
+
+
+def list_indexes() -> List[str]:
+    """Names of the saved index snapshots"""
+    if not os.path.isdir(INDEX_STORE_DIR):
+        return []
+    return sorted(
+        entry.name for entry in os.scandir(INDEX_STORE_DIR)
+        if entry.is_dir() and os.path.exists(os.path.join(entry.path, "index.faiss"))
+    )
+
+
+def save_index(name: str, doc_index: DocumentIndex) -> str:
+    """Write the index and docstore of a document index as a named snapshot"""
+    vectorstore = doc_index.vectorstore
+    if vectorstore is None:
+        raise ValueError("There is nothing indexed to save")
+    os.makedirs(INDEX_STORE_DIR, exist_ok=True)
+    target = _snapshot_dir(name)
+    tmp_dir = tempfile.mkdtemp(dir=INDEX_STORE_DIR, prefix=".saving-")
+    try:
+        faiss.write_index(vectorstore.index, os.path.join(tmp_dir, "index.faiss"))
+        SqliteDocstore.write(os.path.join(tmp_dir, "docstore.sqlite"), _docstore_dict(vectorstore.docstore))
+        with open(os.path.join(tmp_dir, "meta.pkl"), "wb") as f:
+            pickle.dump({
+                "index_to_docstore_id": vectorstore.index_to_docstore_id,
+                "documents": doc_index.documents,
+                "lexical": doc_index.lexical,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # Swap the finished snapshot in so readers never see a partial one
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.replace(tmp_dir, target)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return target
+
+
+def load_index(name: str, embeddings) -> DocumentIndex:
+    """Open a saved snapshot, memory-mapped and shared by every session in the process
+
+    Chunk texts stay on disk and are read per search result, so opening a
+    snapshot costs little more than reading the id mapping and keyword index.
+    """
+    path = _snapshot_dir(name)
+    index_path = os.path.join(path, "index.faiss")
+    mtime = os.path.getmtime(index_path)
+    with _loaded_lock:
+        entry = _loaded.get(name)
+        if entry is None or entry[0] != mtime:
+            start = time.perf_counter()
+            index = faiss.read_index(index_path, _MMAP_FLAGS)
+            with open(os.path.join(path, "meta.pkl"), "rb") as f:
+                state = pickle.load(f)
+            docstore = SqliteDocstore(os.path.join(path, "docstore.sqlite"))
+            vectorstore = RescoringFAISS(
+                embedding_function=embeddings,
+                index=index,
+                docstore=docstore,
+                index_to_docstore_id=state["index_to_docstore_id"],
+            )
+            entry = (mtime, vectorstore, state["documents"], state["lexical"], time.perf_counter() - start)
+            _loaded[name] = entry
+    _, vectorstore, documents, lexical, load_seconds = entry
+    doc_index = DocumentIndex(embeddings)
+    doc_index.vectorstore = vectorstore
+    doc_index.lexical = lexical
+    doc_index.documents = {key: {**doc, "ids": list(doc["ids"])} for key, doc in documents.items()}
+    doc_index.shared = True
+    doc_index.load_seconds = load_seconds
+    return doc_index
+
+
+def delete_index(name: str) -> None:
+    """Remove a saved snapshot from disk"""
+    with _loaded_lock:
+        _loaded.pop(name, None)
+    shutil.rmtree(_snapshot_dir(name), ignore_errors=True)
@@ -0,0 +1,32 @@
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List
+
+
+def iter_text_chunks(pages: Iterable[str], split_text: Callable[[str], List[str]],
+                     buffer_chars: int) -> Iterator[str]:
+    """Split a stream of pages into chunks while holding at most ~buffer_chars of text"""
+    buffer = []
+    buffered = 0
+    for page in pages:
+        buffer.append(page)
+        buffered += len(page)
+        if buffered < buffer_chars:
+            continue
+        chunks = split_text("".join(buffer))
+        # Hold back the last chunk so text crossing the boundary stays together
+        yield from chunks[:-1]
+        buffer = chunks[-1:]
+        buffered = sum(len(chunk) for chunk in buffer)
+    if buffer:
+        yield from split_text("".join(buffer))
+
+
+def iter_batches(items: Iterable, batch_size: int) -> Iterator[list]:
+    """Group an iterable into lists of at most batch_size items"""
+    items = iter(items)
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            return
+        yield batch
+
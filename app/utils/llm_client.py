@@ -0,0 +1,153 @@
+import copy
+import hashlib
+import threading
+import time
+from functools import lru_cache, partial
+
+import httpx
+from langchain_groq import ChatGroq
+
+from config import (
+    GROQ_BASE_URL,
+    GROQ_OUTPUT_TOKENS_ESTIMATE,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_READ_TIMEOUT,
+)
+from utils.scheduler import PRIORITY_CHAT, get_scheduler
+from utils.single_flight import SingleFlight
+from utils.text_chunker import count_tokens
+from utils.tracing import span
+
+_http_client = None
+_http_async_client = None
+_clients_lock = threading.Lock()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+
+
+def get_http_client() -> httpx.Client:
+    """Process-wide keep-alive connection pool for synchronous Groq calls"""
+    global _http_client
+    with _clients_lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = httpx.Client(limits=_limits(), timeout=_timeout())
+        return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Process-wide keep-alive connection pool for asynchronous Groq calls
+
+    Its connections belong to the event loop that opened them, so async
+    calls should all run on one long-lived loop.
+    """
+    global _http_async_client
+    with _clients_lock:
+        if _http_async_client is None or _http_async_client.is_closed:
+            _http_async_client = httpx.AsyncClient(limits=_limits(), timeout=_timeout())
+        return _http_async_client
+
+
+# Identical Groq requests in flight at the same time, from any session, share one call
+llm_flights = SingleFlight()
+
+
+class CoalescingChatGroq(ChatGroq):
+    """ChatGroq that sends concurrent identical requests upstream once, through the rate-limit scheduler
+
+    Requests are identical when API key, model, sampling settings,
+    priority and messages match, so only calls of one account are shared
+    (a failed call is retried by each waiter). The shared call is queued
+    and retried by the scheduler under that key's budget.
+    """
+
+    priority: int = PRIORITY_CHAT
+
+    def _key_hash(self):
+        return hashlib.sha1(self.groq_api_key.get_secret_value().encode()).hexdigest() if self.groq_api_key else ""
+
+    def _flight_key(self, messages, stop, kwargs):
+        return (
+            self._key_hash(), self.model_name, self.temperature, self.max_tokens, self.priority, tuple(stop or ()),
+            repr(sorted(kwargs.items())), tuple((message.type, repr(message.content)) for message in messages),
+        )
+
+    def _output_estimate(self):
+        return self.max_tokens or GROQ_OUTPUT_TOKENS_ESTIMATE
+
+    def _budget_args(self, messages):
+        """Scheduler budget key, model and estimated tokens of a request"""
+        tokens = sum(count_tokens(message.content) for message in messages if isinstance(message.content, str))
+        return self._key_hash(), self.model_name, tokens + self._output_estimate()
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.streaming:
+            # Goes through _stream, which coalesces
+            return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        budget_args = self._budget_args(messages)
+        with span("llm", model=self.model_name, tokens_in=budget_args[2] - self._output_estimate()) as llm_span:
+            upstream = partial(super()._generate, messages, stop=stop, run_manager=run_manager, **kwargs)
+            call = partial(get_scheduler().run, *budget_args, upstream, self.priority)
+            result = llm_flights.do(self._flight_key(messages, stop, kwargs), call)
+            llm_span.set(tokens_out=sum(count_tokens(generation.text) for generation in result.generations))
+        # Callbacks stamp ids onto the messages, so each caller gets its own copy
+        return copy.deepcopy(result)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        # The upstream call runs without callbacks on a background thread;
+        # each caller reports the tokens it yields to its own callbacks
+        budget_args = self._budget_args(messages)
+        upstream = partial(super()._stream, messages, stop=stop, **kwargs)
+        call = partial(get_scheduler().stream, *budget_args, upstream, self.priority)
+
+        def on_chunk(chunk):
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+
+        with span("llm", model=self.model_name, tokens_in=budget_args[2] - self._output_estimate()) as llm_span:
+            text = ""
+            for chunk in llm_flights.stream(self._flight_key(messages, stop, kwargs), call, on_chunk):
+                if not text and chunk.text:
+                    llm_span.set(first_token_ms=round((time.perf_counter() - llm_span.start) * 1000, 1))
+                text += chunk.text
+                yield copy.copy(chunk)
+            llm_span.set(tokens_out=count_tokens(text))
+
+
+@lru_cache(maxsize=16)
+def get_chat_model(model_id: str, api_key: str, temperature=None, streaming: bool = False,
+                   priority: int = PRIORITY_CHAT) -> ChatGroq:
+    """Coalescing, rate-limited ChatGroq client on the shared connection pools
+
+    One client per model, key, temperature, streaming mode and scheduler
+    priority.
+    """
+    kwargs = {} if temperature is None else {"temperature": temperature}
+    if GROQ_BASE_URL:
+        kwargs["base_url"] = GROQ_BASE_URL
+    if streaming:
+        # Only set when wanted: an explicit streaming=False also turns off .stream()
+        kwargs["streaming"] = True
+    return CoalescingChatGroq(
+        model=model_id,
+        groq_api_key=api_key,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+        timeout=_timeout(),
+        # Retries are left to the scheduler, which honours Retry-After across all calls
+        max_retries=0,
+        priority=priority,
+        **kwargs
+    )
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+import PyPDF2
+
+from config import PDF_CACHE_DIR, PDF_CACHE_MAX_MB
+from utils.disk_lru import evict, scan, touch
+
+# Bump the suffix whenever the extraction logic changes output
+EXTRACTOR_VERSION = f"PyPDF2-{PyPDF2.__version__}/1"
+
+
+class PdfTextCache:
+    """Content-addressed on-disk cache of per-page PDF text with LRU eviction"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key_for(data: bytes) -> str:
+        """Hash the file bytes together with the extractor version"""
+        digest = hashlib.sha256(EXTRACTOR_VERSION.encode())
+        digest.update(b"\0")
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """Return the cached pages for a key, or None on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                pages = json.load(f)
+            touch(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return pages
+
+    def put(self, key: str, pages: List[str]) -> None:
+        """Store the pages for a key and evict old entries beyond the size cap"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(pages, f)
+        os.replace(tmp_path, self._path(key))
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            self.evictions += evict(self.directory, ".json", self.max_bytes)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and current disk usage"""
+        entries = scan(self.directory, ".json")
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(entries),
+                "size_mb": sum(size for _, size, _ in entries) / (1024 * 1024),
+                "max_mb": self.max_bytes / (1024 * 1024),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_pdf_cache() -> PdfTextCache:
+    """Return the process-wide PDF text cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PdfTextCache(PDF_CACHE_DIR, int(PDF_CACHE_MAX_MB * 1024 * 1024))
+        return _cache
@@ -0,0 +1,179 @@
+import os
+import tempfile
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from PyPDF2 import PdfReader
+
+from config import PDF_EXTRACT_WORKERS, PDF_PAGES_PER_TASK
+from utils.pdf_cache import PdfTextCache, get_pdf_cache
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+# Readers opened inside a pool worker process, keyed by file path, so consecutive
+# page ranges of the same PDF don't re-parse the cross-reference table. Only
+# used in workers, where tasks run one at a time; never in the app's own process
+_worker_readers = {}
+_WORKER_READER_LIMIT = 4
+
+
+def _get_executor(max_workers: int) -> ProcessPoolExecutor:
+    """Return the shared extraction pool, resizing it if the worker count changed"""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != max_workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            # spawn avoids forking the Streamlit server with its threads running
+            _executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _executor_workers = max_workers
+        return _executor
+
+
+def read_pdf_bytes(pdf) -> bytes:
+    """Get the raw bytes of an uploaded file, path or file-like object"""
+    if isinstance(pdf, (bytes, bytearray)):
+        return bytes(pdf)
+    if isinstance(pdf, (str, os.PathLike)):
+        with open(pdf, "rb") as f:
+            return f.read()
+    if hasattr(pdf, "getvalue"):
+        return pdf.getvalue()
+    pdf.seek(0)
+    return pdf.read()
+
+
+def _open_reader(path: str) -> PdfReader:
+    """Open a PDF inside a worker, reusing the reader for repeated ranges"""
+    reader = _worker_readers.get(path)
+    if reader is None:
+        if len(_worker_readers) >= _WORKER_READER_LIMIT:
+            _worker_readers.pop(next(iter(_worker_readers)))
+        reader = PdfReader(path)
+        _worker_readers[path] = reader
+    return reader
+
+
+def _read_pages(reader: PdfReader, start: int, stop: int) -> List[str]:
+    """Extract the text of pages [start, stop) from an open PDF"""
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> List[str]:
+    """Extract the text of pages [start, stop) of a PDF on disk, in a pool worker"""
+    return _read_pages(_open_reader(path), start, stop)
+
+
+def _iter_shards(shards, max_workers: int):
+    """Run (doc, task) shards and yield (doc, pages) in submission order"""
+    if max_workers <= 1 or len(shards) <= 1:
+        # In-process, so several sessions may be here at once: each call opens its own
+        # reader, once per document as a document's shards are consecutive
+        reader_path, reader = None, None
+        for doc, (path, start, stop) in shards:
+            if path != reader_path:
+                reader_path, reader = path, PdfReader(path)
+            yield doc, _read_pages(reader, start, stop)
+        return
+
+    # Keep a bounded window of shards in flight
+    executor = _get_executor(max_workers)
+    window = max_workers * 2
+    pending = deque()
+    shard_iter = iter(shards)
+    try:
+        for doc, task in shard_iter:
+            pending.append((doc, executor.submit(_extract_page_range, *task)))
+            if len(pending) >= window:
+                break
+        while pending:
+            doc, future = pending.popleft()
+            pages = future.result()
+            next_shard = next(shard_iter, None)
+            if next_shard is not None:
+                next_doc, task = next_shard
+                pending.append((next_doc, executor.submit(_extract_page_range, *task)))
+            yield doc, pages
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def iter_document_pages(pdf_docs, max_workers: Optional[int] = None,
+                        pages_per_task: Optional[int] = None,
+                        use_cache: bool = True,
+                        on_total: Optional[Callable[[int], None]] = None) -> Iterator[Tuple[int, str]]:
+    """Yield (document index, page text) for every page of every PDF, in order"""
+    max_workers = max_workers or PDF_EXTRACT_WORKERS
+    pages_per_task = pages_per_task or PDF_PAGES_PER_TASK
+    cache = get_pdf_cache() if use_cache else None
+
+    with tempfile.TemporaryDirectory(prefix="pdf_extract_") as tmp_dir:
+        # Cached documents become a single pre-resolved shard; the rest are
+        # written to disk so each task only ships a path and a page range
+        shards = []
+        total_pages = 0
+        for i, pdf in enumerate(pdf_docs):
+            data = read_pdf_bytes(pdf)
+            key = PdfTextCache.key_for(data) if cache is not None else None
+            cached = cache.get(key) if cache is not None else None
+            if cached is not None:
+                shards.append(({"index": i, "key": key, "cached": True}, cached))
+                total_pages += len(cached)
+                continue
+            path = os.path.join(tmp_dir, f"{i}.pdf")
+            with open(path, "wb") as f:
+                f.write(data)
+            page_count = len(PdfReader(path).pages)
+            total_pages += page_count
+            doc = {"index": i, "key": key, "cached": False, "shards": 0, "pages": []}
+            for start in range(0, page_count, pages_per_task):
+                shards.append((doc, (path, start, min(start + pages_per_task, page_count))))
+                doc["shards"] += 1
+            if page_count == 0 and cache is not None:
+                cache.put(key, [])
+        if on_total is not None:
+            on_total(total_pages)
+
+        results = _iter_shards(
+            [(doc, task) for doc, task in shards if not doc["cached"]], max_workers
+        )
+        try:
+            for doc, payload in shards:
+                if doc["cached"]:
+                    for page in payload:
+                        yield doc["index"], page
+                    continue
+                _, pages = next(results)
+                doc["pages"].extend(pages)
+                doc["shards"] -= 1
+                if doc["shards"] == 0 and cache is not None:
+                    cache.put(doc["key"], doc["pages"])
+                for page in pages:
+                    yield doc["index"], page
+        finally:
+            results.close()
+
+
+def iter_pdf_pages(pdf_docs, max_workers: Optional[int] = None,
+                   pages_per_task: Optional[int] = None,
+                   use_cache: bool = True,
+                   on_total: Optional[Callable[[int], None]] = None) -> Iterator[str]:
+    """Yield the text of every page of every PDF, in document and page order"""
+    for _, page in iter_document_pages(pdf_docs, max_workers, pages_per_task, use_cache, on_total):
+        yield page
+
+
+def extract_pdf_pages(pdf_docs, max_workers: Optional[int] = None,
+                      pages_per_task: Optional[int] = None,
+                      use_cache: bool = True) -> List[str]:
+    """Extract the text of all pages from PDF documents"""
+    return list(iter_pdf_pages(pdf_docs, max_workers, pages_per_task, use_cache))
@@ -0,0 +1,264 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import (
+    RESPONSE_CACHE_BACKEND,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_SIMILARITY,
+    RESPONSE_CACHE_TTL_SECONDS,
+)
+
+_SPACE_RE = re.compile(r"\s+")
+_PUNCTUATION = ".,;:!?()[]{}\"'"
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    return _SPACE_RE.sub(" ", question.lower()).strip().rstrip("?!.。 ")
+
+
+def identifiers(question: str) -> frozenset:
+    """Numbers and tokens with digits in them (M8, section 3, v2.1), which similar questions must share"""
+    tokens = (token.strip(_PUNCTUATION) for token in question.lower().split())
+    return frozenset(token for token in tokens if any(ch.isdigit() for ch in token))
+
+
+def fingerprint(parts: Iterable[str]) -> str:
+    """Stable hash of the context an answer depends on, e.g. retrieved chunk ids"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class MemoryBackend:
+    """Cache entries in a process-local LRU dict"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def group(self, group: str) -> List[Tuple[str, np.ndarray]]:
+        return [(key, entry["vector"]) for key, entry in self._entries.items()
+                if entry["group"] == group and entry["vector"] is not None]
+
+    def put(self, entry: Dict) -> None:
+        self._entries[entry["key"]] = entry
+        self._entries.move_to_end(entry["key"])
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteBackend:
+    """Cache entries in a local SQLite file, shared by processes on the machine"""
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, grp TEXT NOT NULL, question TEXT, "
+            "answer TEXT, vector BLOB, created REAL, last_used REAL, latency_s REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_grp ON responses (grp)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[Dict]:
+        row = self._db.execute(
+            "SELECT key, grp, question, answer, vector, created, latency_s FROM responses WHERE key = ?",
+            (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._db.commit()
+        return {
+            "key": row[0], "group": row[1], "question": row[2], "answer": row[3],
+            "vector": np.frombuffer(row[4], dtype=np.float32) if row[4] is not None else None,
+            "created": row[5], "latency_s": row[6],
+        }
+
+    def group(self, group: str) -> List[Tuple[str, np.ndarray]]:
+        rows = self._db.execute(
+            "SELECT key, vector FROM responses WHERE grp = ? AND vector IS NOT NULL", (group,)
+        ).fetchall()
+        return [(key, np.frombuffer(vector, dtype=np.float32)) for key, vector in rows]
+
+    def put(self, entry: Dict) -> None:
+        vector = entry["vector"]
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (entry["key"], entry["group"], entry["question"], entry["answer"],
+             vector.astype(np.float32).tobytes() if vector is not None else None,
+             entry["created"], time.time(), entry["latency_s"])
+        )
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+        self._db.commit()
+
+    def delete(self, key: str) -> None:
+        self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+        self._db.commit()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class ResponseCache:
+    """LLM answers keyed on (model, language, context fingerprint, normalised question)
+
+    With an embedding model and a similarity above 0, a question that
+    misses exactly can still hit an earlier answer for the same model,
+    language and context whose question embedding has cosine similarity
+    of at least similarity and which has the same numbers and identifiers:
+    embeddings barely tell "bolt M8" from "bolt M10".
+    """
+
+    def __init__(self, backend, ttl: float = RESPONSE_CACHE_TTL_SECONDS, embeddings=None,
+                 similarity: float = RESPONSE_CACHE_SIMILARITY):
+        self.backend = backend
+        self.ttl = ttl
+        self.embeddings = embeddings
+        self.similarity = similarity
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        # A missed question is embedded again when its answer is stored
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    @staticmethod
+    def _group(model: str, language: str, context: str) -> str:
+        return fingerprint([model, language or "", context or ""])
+
+    def _embed(self, question: str) -> Optional[np.ndarray]:
+        # Only use the embedding model once it is loaded; never make a turn wait for it
+        if self.embeddings is None or self.similarity <= 0 or not getattr(self.embeddings, "loaded", True):
+            return None
+        with self._lock:
+            vector = self._vectors.pop(question, None)
+        if vector is None:
+            vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+            vector /= np.linalg.norm(vector) or 1.0
+        with self._lock:
+            self._vectors[question] = vector
+            while len(self._vectors) > 64:
+                self._vectors.popitem(last=False)
+        return vector
+
+    def _fresh(self, entry: Optional[Dict]) -> Optional[Dict]:
+        if entry is not None and time.time() - entry["created"] > self.ttl:
+            self.backend.delete(entry["key"])
+            return None
+        return entry
+
+    def get(self, model: str, language: str, context: str, question: str) -> Optional[Dict]:
+        """Cached entry with "answer" and "latency_s", or None"""
+        group = self._group(model, language, context)
+        normalized = normalize_question(question)
+        key = fingerprint([group, normalized])
+        semantic = False
+        with self._lock:
+            entry = self._fresh(self.backend.get(key))
+        if entry is None:
+            vector = self._embed(normalized)
+            if vector is not None:
+                with self._lock:
+                    candidates = self.backend.group(group)
+                    if candidates:
+                        keys, vectors = zip(*candidates)
+                        scores = np.stack(vectors) @ vector
+                        wanted = identifiers(normalized)
+                        for best in np.argsort(-scores):
+                            if scores[best] < self.similarity:
+                                break
+                            candidate = self._fresh(self.backend.get(keys[best]))
+                            if candidate is not None and identifiers(candidate["question"]) == wanted:
+                                entry, semantic = candidate, True
+                                break
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.semantic_hits += semantic
+                self.saved_seconds += entry["latency_s"] or 0.0
+        return entry
+
+    def put(self, model: str, language: str, context: str, question: str, answer: str,
+            latency_s: float = 0.0) -> None:
+        """Store an answer and how long it took to produce"""
+        group = self._group(model, language, context)
+        normalized = normalize_question(question)
+        entry = {
+            "key": fingerprint([group, normalized]),
+            "group": group,
+            "question": normalized,
+            "answer": answer,
+            "vector": self._embed(normalized),
+            "created": time.time(),
+            "latency_s": latency_s,
+        }
+        with self._lock:
+            self.backend.put(entry)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit rate and generation time saved"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": self.saved_seconds,
+                "entries": len(self.backend),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from utils.embeddings import get_embedding_service
+
+            if RESPONSE_CACHE_BACKEND == "sqlite":
+                backend = SqliteBackend(RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_ENTRIES)
+            else:
+                backend = MemoryBackend(RESPONSE_CACHE_MAX_ENTRIES)
+            _cache = ResponseCache(backend, embeddings=get_embedding_service())
+        return _cache
@@ -1,17 +1,16 @@
 import streamlit as st
-from langchain_groq import ChatGroq
 import docx
 from pathlib import Path
 import sys
 from typing import List, Dict
 import json
 
+from utils.llm_client import get_chat_model
+from utils.tracing import span
+
 class ResumeOptimizer:
     def __init__(self, groq_api_key: str, model_id: str):
-        self.llm = ChatGroq(
-            groq_api_key=groq_api_key,
-            model_name=model_id
-        )
+        self.llm = get_chat_model(model_id, groq_api_key)
         self.added_skills = []
         self.added_projects = []
 
@@ -29,7 +28,8 @@ class ResumeOptimizer:
         Return the analysis in JSON format with keys: 'technical_skills', 'experience_level', 'responsibilities'
         """
         
-        response = self.llm.invoke(prompt)
+        with span("analyze_job_description"):
+            response = self.llm.invoke(prompt)
         try:
             return json.loads(response.content)
         except:
@@ -53,7 +53,8 @@ class ResumeOptimizer:
         - outcomes (list)
         """
         
-        response = self.llm.invoke(prompt)
+        with span("generate_projects"):
+            response = self.llm.invoke(prompt)
         try:
             return json.loads(response.content)["projects"]
         except:
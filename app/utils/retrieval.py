@@ -0,0 +1,42 @@
+from typing import Any, Dict, List, Sequence
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from config import HYBRID_FETCH_K, RETRIEVER_K, RRF_K
+from utils.tracing import span
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[str]:
+    """Merge ranked id lists, scoring each id by the sum of 1 / (k + rank) over the lists"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class HybridRetriever(BaseRetriever):
+    """Retriever fusing dense FAISS results with BM25 keyword matches"""
+
+    vectorstore: Any
+    lexical: Any
+    k: int = RETRIEVER_K
+    fetch_k: int = HYBRID_FETCH_K
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        with span("vector_search"):
+            dense = self.vectorstore.similarity_search(query, k=self.fetch_k)
+        docs = {doc.id: doc for doc in dense}
+        with span("bm25_search"):
+            lexical_ids = [doc_id for doc_id, _ in self.lexical.search(query, self.fetch_k)]
+        fused = reciprocal_rank_fusion([[doc.id for doc in dense], lexical_ids])[:self.k]
+        results = []
+        for doc_id in fused:
+            doc = docs.get(doc_id)
+            if doc is None:
+                doc = self.vectorstore.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                results.append(doc)
+        return results
@@ -0,0 +1,242 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional, Tuple
+
+import groq
+
+from config import (
+    GROQ_BACKOFF_BASE_SECONDS,
+    GROQ_BACKOFF_MAX_SECONDS,
+    GROQ_MAX_RETRIES,
+    GROQ_MODELS,
+    GROQ_RATE_LIMIT_MARGIN_SECONDS,
+    GROQ_REQUESTS_PER_MINUTE,
+    GROQ_TOKENS_PER_MINUTE,
+)
+from utils.tracing import span
+
+# Lower values are served first
+PRIORITY_CHAT = 0
+PRIORITY_BACKGROUND = 1
+
+WINDOW_SECONDS = 60.0
+
+
+def rate_limits_for(model_id: Optional[str]) -> Tuple[int, int]:
+    """Requests and tokens per minute allowed for a model by its Groq id"""
+    for model in GROQ_MODELS.values():
+        if model["id"] == model_id:
+            return (model.get("requests_per_minute", GROQ_REQUESTS_PER_MINUTE),
+                    model.get("tokens_per_minute", GROQ_TOKENS_PER_MINUTE))
+    return GROQ_REQUESTS_PER_MINUTE, GROQ_TOKENS_PER_MINUTE
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait, from the Retry-After header of an API error"""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections are worth retrying"""
+    if isinstance(error, groq.APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return isinstance(error, groq.APIConnectionError)
+
+
+class _Budget:
+    """Requests and tokens sent in the last minute for one API key and model, and who waits for them"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, margin: float = 0.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        # Seconds a sent request is kept past the window, for the time it takes to reach the server
+        self.margin = margin
+        self.sent = deque()
+        self.tokens = 0
+        self.paused_until = 0.0
+        self.queue = []
+
+    def delay(self, tokens: int, now: float) -> float:
+        """Seconds until a request of tokens fits the limits"""
+        window = WINDOW_SECONDS + self.margin
+        while self.sent and now - self.sent[0][0] >= window:
+            self.tokens -= self.sent.popleft()[1]
+        delay = max(0.0, self.paused_until - now)
+        if len(self.sent) >= self.requests_per_minute:
+            delay = max(delay, self.sent[0][0] + window - now)
+        excess = self.tokens + tokens - self.tokens_per_minute
+        # A request larger than the whole budget goes alone once the window is empty
+        if excess > 0 and self.sent:
+            freed = 0
+            for sent_at, sent_tokens in self.sent:
+                freed += sent_tokens
+                if freed >= excess:
+                    break
+            delay = max(delay, sent_at + window - now)
+        return delay
+
+    def record(self, tokens: int, now: float) -> Tuple[float, int]:
+        entry = (now, tokens)
+        self.sent.append(entry)
+        self.tokens += tokens
+        return entry
+
+    def refund(self, entry: Tuple[float, int]) -> None:
+        """Forget a request the server rejected, as it did not count against the limit"""
+        try:
+            self.sent.remove(entry)
+        except ValueError:
+            return
+        self.tokens -= entry[1]
+
+
+class RateLimitScheduler:
+    """Queue Groq calls per API key and model so they stay inside its rate limits
+
+    Waiting calls are served in priority order (chat before background
+    summarization), then first come first served. Calls that fail with a
+    429 or a transient error are retried with jittered exponential
+    backoff; a 429 pauses the whole budget for the server's Retry-After.
+    """
+
+    def __init__(self, max_retries: int = GROQ_MAX_RETRIES, backoff_base: float = GROQ_BACKOFF_BASE_SECONDS,
+                 backoff_max: float = GROQ_BACKOFF_MAX_SECONDS, margin: float = GROQ_RATE_LIMIT_MARGIN_SECONDS):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.margin = margin
+        self._cond = threading.Condition()
+        self._budgets: Dict[Hashable, _Budget] = {}
+        self._seq = itertools.count()
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _budget(self, key: Hashable, model_id: str) -> _Budget:
+        budget = self._budgets.get((key, model_id))
+        if budget is None:
+            budget = self._budgets[(key, model_id)] = _Budget(*rate_limits_for(model_id), self.margin)
+        return budget
+
+    def acquire(self, key: Hashable, model_id: str, tokens: int, priority: int = PRIORITY_CHAT) -> Tuple[float, int]:
+        """Block until a request of about tokens may be sent; returns its entry in the budget"""
+        start = time.monotonic()
+        with span("rate_limit_wait", merge=True), self._cond:
+            budget = self._budget(key, model_id)
+            ticket = (priority, next(self._seq))
+            heapq.heappush(budget.queue, ticket)
+            try:
+                while True:
+                    if budget.queue[0] == ticket:
+                        now = time.monotonic()
+                        delay = budget.delay(tokens, now)
+                        if delay <= 0:
+                            entry = budget.record(tokens, now)
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+            finally:
+                budget.queue.remove(ticket)
+                heapq.heapify(budget.queue)
+                self._cond.notify_all()
+            waited = time.monotonic() - start
+            self.requests += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return entry
+
+    def _backoff(self, key: Hashable, model_id: str, error: Exception, attempt: int, entry: Tuple[float, int]) -> None:
+        """Wait before retrying a failed call, pausing the budget on a 429"""
+        server_delay = retry_after(error)
+        if server_delay is not None:
+            # Jitter so callers told the same Retry-After don't all return together
+            delay = server_delay + random.uniform(0, self.backoff_base)
+        else:
+            cap = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+            delay = cap / 2 + random.uniform(0, cap / 2)
+        with self._cond:
+            self.retries += 1
+            if getattr(error, "status_code", None) == 429:
+                self.rate_limited += 1
+                budget = self._budget(key, model_id)
+                budget.refund(entry)
+                budget.paused_until = max(budget.paused_until, time.monotonic() + delay)
+                self._cond.notify_all()
+                return
+        time.sleep(delay)
+
+    def run(self, key: Hashable, model_id: str, tokens: int, fn: Callable[[], Any],
+            priority: int = PRIORITY_CHAT) -> Any:
+        """Return fn() once the rate limits allow it, retrying 429s and transient errors"""
+        for attempt in range(self.max_retries + 1):
+            entry = self.acquire(key, model_id, tokens, priority)
+            try:
+                return fn()
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                self._backoff(key, model_id, e, attempt, entry)
+
+    def stream(self, key: Hashable, model_id: str, tokens: int, fn: Callable[[], Iterable[Any]],
+               priority: int = PRIORITY_CHAT) -> Iterator[Any]:
+        """Like run for a streamed call; only retried until its first chunk arrives"""
+        for attempt in range(self.max_retries + 1):
+            entry = self.acquire(key, model_id, tokens, priority)
+            chunks = iter(fn())
+            try:
+                first = next(chunks)
+            except StopIteration:
+                return
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                self._backoff(key, model_id, e, attempt, entry)
+                continue
+            yield first
+            yield from chunks
+            return
+
+    def stats(self) -> Dict[str, float]:
+        """Queue depth, wait times and retries"""
+        with self._cond:
+            return {
+                "queued": sum(len(budget.queue) for budget in self._budgets.values()),
+                "requests": self.requests,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "avg_wait_seconds": self.wait_seconds / self.requests if self.requests else 0.0,
+                "max_wait_seconds": self.max_wait_seconds,
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """Return the process-wide Groq call scheduler"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RateLimitScheduler()
+        return _scheduler
@@ -0,0 +1,125 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List
+
+
+class _Flight:
+    """One upstream call and everything it has produced so far"""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.chunks: List[Any] = []
+        self.result = None
+        self.error = None
+        self.done = False
+
+    def push(self, chunk) -> None:
+        with self.cond:
+            self.chunks.append(chunk)
+            self.cond.notify_all()
+
+    def finish(self, result=None, error=None) -> None:
+        with self.cond:
+            self.result = result
+            self.error = error
+            self.done = True
+            self.cond.notify_all()
+
+
+class SingleFlight:
+    """Share one call among concurrent callers with the same key
+
+    The first caller for a key (the leader) runs the call; callers that
+    arrive while it is in flight wait and get its result instead of
+    making their own. If the shared call fails before a waiter has
+    received anything, the waiter makes the call itself, so one bad
+    request never fails others that would have worked.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def _join(self, key: Hashable):
+        """Return (flight, is_leader)"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            self.calls += 1
+            return flight, True
+
+    def _land(self, key: Hashable, flight: _Flight, result=None, error=None) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.finish(result, error)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Return fn(), or the result of an identical call already in flight"""
+        flight, leader = self._join(key)
+        if leader:
+            try:
+                result = fn()
+            except BaseException as e:
+                self._land(key, flight, error=e)
+                raise
+            self._land(key, flight, result)
+            return result
+        with flight.cond:
+            flight.cond.wait_for(lambda: flight.done)
+        if flight.error is not None:
+            return fn()
+        return flight.result
+
+    def stream(self, key: Hashable, fn: Callable[[], Iterable[Any]],
+               on_chunk: Callable[[Any], None] = None) -> Iterator[Any]:
+        """Yield the chunks of fn(), or of an identical stream already in flight
+
+        The upstream stream is read by a background thread, so every
+        caller, the first included, only replays it and can stop early
+        without cutting off the others; on_chunk is called for each chunk
+        the caller yields.
+        """
+        flight, leader = self._join(key)
+        if leader:
+            def pump():
+                try:
+                    for chunk in fn():
+                        flight.push(chunk)
+                except Exception as e:
+                    self._land(key, flight, error=e)
+                else:
+                    self._land(key, flight)
+
+            threading.Thread(target=pump, daemon=True, name="single-flight-stream").start()
+
+        seen = 0
+        while True:
+            with flight.cond:
+                flight.cond.wait_for(lambda: flight.done or len(flight.chunks) > seen)
+                chunks = flight.chunks[seen:]
+                done, error = flight.done, flight.error
+            for chunk in chunks:
+                if on_chunk:
+                    on_chunk(chunk)
+                yield chunk
+            seen += len(chunks)
+            if done:
+                break
+        if error is not None:
+            if seen or leader:
+                # Part of the answer is already out, or the call failed on our own request
+                raise error
+            for chunk in fn():
+                if on_chunk:
+                    on_chunk(chunk)
+                yield chunk
+
+    def stats(self) -> Dict[str, int]:
+        """Upstream calls made and requests that shared one instead"""
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._flights)}
@@ -0,0 +1,223 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from langchain.chains.summarize import load_summarize_chain
+from langchain.docstore.document import Document
+from langchain.prompts import PromptTemplate
+
+from config import SUMMARY_CACHE_ENABLED, SUMMARY_MAP_CONCURRENCY
+from utils.summary_cache import get_summary_cache
+from utils.text_chunker import count_tokens, get_chunker, summary_chunk_sizes, truncate_tokens
+from utils.tracing import span
+
+MAP_PROMPT = PromptTemplate(
+    template="Summarize the following text concisely:\n\n{text}\n\nSummary:",
+    input_variables=["text"]
+)
+
+# For text that fits in a single request
+STUFF_PROMPT = PromptTemplate(
+    template="Write a {summary_type} summary of the following text:\n\n{text}\n\nSummary:",
+    input_variables=["text", "summary_type"]
+)
+
+# Intermediate levels of the reduce tree keep detail; only the last one applies the summary type
+COMBINE_PROMPT = PromptTemplate(
+    template="Combine the following summaries into one concise summary that keeps every key point:\n\n{text}\n\nCombined Summary:",
+    input_variables=["text"]
+)
+
+REDUCE_PROMPT = PromptTemplate(
+    template="""Combine and create a final {summary_type} summary of the following summaries:
+                \n\n{text}\n\nFinal Summary:""",
+    input_variables=["text", "summary_type"]
+)
+
+
+def _run_concurrently(fn: Callable, items: List, max_workers: int) -> List:
+    """fn over items, up to max_workers at a time, with results in item order"""
+    if max_workers <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix="summarize") as pool:
+        # Each task runs in a copy of this context so its spans land under the caller's
+        futures = [pool.submit(contextvars.copy_context().run, fn, item) for item in items]
+        return [future.result() for future in futures]
+
+
+def map_summaries(llm, chunks: List[str], max_workers: int = SUMMARY_MAP_CONCURRENCY) -> List[str]:
+    """Summarize each chunk, up to max_workers at a time, returning summaries in chunk order"""
+    chain = load_summarize_chain(llm, chain_type="stuff", prompt=MAP_PROMPT)
+
+    def summarize_chunk(chunk):
+        result = chain.invoke({"input_documents": [Document(page_content=chunk)], "text": chunk})
+        return result["output_text"]
+
+    with span("map", chunks=len(chunks), concurrency=min(max_workers, len(chunks))):
+        return _run_concurrently(summarize_chunk, chunks, max_workers)
+
+
+def batch_summaries(summaries: List[str], budget: int) -> List[List[str]]:
+    """Group summaries, in order, into batches of at most budget tokens
+
+    Each summary is cut to half the budget, so any two fit together and
+    every batch but the last holds at least two: each level of the
+    reduce tree at least halves the number of summaries.
+    """
+    limit = max(1, budget // 2)
+    batches, current, used = [], [], 0
+    for summary in summaries:
+        tokens = count_tokens(summary)
+        if tokens > limit:
+            summary, tokens = truncate_tokens(summary, limit), limit
+        if current and used + tokens > budget:
+            batches.append(current)
+            current, used = [], 0
+        current.append(summary)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def reduce_summaries(llm, summaries: List[str], summary_type: str, model_id: Optional[str],
+                     max_workers: int = SUMMARY_MAP_CONCURRENCY, stats: Optional[Dict] = None) -> str:
+    """Combine chunk summaries into one summary of the requested type, level by level
+
+    Summaries are batched to fit the model's context and each batch is
+    combined into one, batches of a level in parallel, until a single
+    batch remains for the final summary. Levels are recorded in stats.
+    """
+    budget = summary_chunk_sizes(model_id)[0]
+    combine = load_summarize_chain(llm, chain_type="stuff", prompt=COMBINE_PROMPT)
+    final = load_summarize_chain(llm, chain_type="stuff", prompt=REDUCE_PROMPT)
+    levels = []
+
+    def combine_batch(batch):
+        if len(batch) == 1:
+            # Carried up to the next level as is
+            return batch[0]
+        text = "\n\n".join(batch)
+        return combine.invoke({"input_documents": [Document(page_content=text)], "text": text})["output_text"]
+
+    with span("reduce") as reduce_span:
+        while True:
+            batches = batch_summaries(summaries, budget)
+            # Batches of one are carried up without a call, except for the final summary
+            sent = batches if len(batches) == 1 else [batch for batch in batches if len(batch) > 1]
+            level = {
+                "inputs": len(summaries),
+                "batches": len(batches),
+                "fan_out": max(len(batch) for batch in batches),
+                "calls": len(sent),
+                "tokens": sum(count_tokens(summary) for batch in sent for summary in batch),
+            }
+            levels.append(level)
+            if len(batches) == 1:
+                break
+            with span("reduce_level", level=len(levels), **level):
+                summaries = _run_concurrently(combine_batch, batches, max_workers)
+
+        text = "\n\n".join(batches[0])
+        with span("reduce_level", level=len(levels), **levels[-1]):
+            result = final.invoke({
+                "input_documents": [Document(page_content=text)],
+                "text": text,
+                "summary_type": summary_type
+            })["output_text"]
+        reduce_span.set(depth=len(levels))
+
+    if stats is not None:
+        stats["reduce_levels"] = levels
+    return result
+
+
+def map_text(text: str, llm, model_id: Optional[str], max_workers: int = SUMMARY_MAP_CONCURRENCY,
+             stats: Optional[Dict] = None) -> List[str]:
+    """Split text into chunks sized for model_id and summarize them concurrently
+
+    Text that fits in one request comes back as is, in a list of one, to
+    be summarized by combine_summaries in a single call.
+    """
+    stats = {} if stats is None else stats
+    with span("split"):
+        chunks = get_chunker(*summary_chunk_sizes(model_id)).split_text(text)
+    stats["chunks"] = len(chunks)
+    if len(chunks) <= 1:
+        return chunks
+    stats["calls"] = stats.get("calls", 0) + len(chunks)
+    stats["tokens"] = stats.get("tokens", 0) + sum(count_tokens(chunk) for chunk in chunks)
+    return map_summaries(llm, chunks, max_workers)
+
+
+def combine_summaries(llm, parts: List[str], summary_type: str, model_id: Optional[str],
+                      max_workers: int = SUMMARY_MAP_CONCURRENCY, stats: Optional[Dict] = None) -> str:
+    """Final summary of the requested type from what map_text returned"""
+    stats = {} if stats is None else stats
+    if not parts:
+        return ""
+    if len(parts) == 1:
+        # Nothing to combine, so ask for the requested summary type straight away
+        stats["calls"] = stats.get("calls", 0) + 1
+        stats["tokens"] = stats.get("tokens", 0) + count_tokens(parts[0])
+        with span("map", chunks=1, concurrency=1):
+            return load_summarize_chain(llm, chain_type="stuff", prompt=STUFF_PROMPT).invoke({
+                "input_documents": [Document(page_content=parts[0])],
+                "text": parts[0],
+                "summary_type": summary_type
+            })["output_text"]
+    summary = reduce_summaries(llm, parts, summary_type, model_id, max_workers, stats)
+    stats["calls"] = stats.get("calls", 0) + sum(level["calls"] for level in stats["reduce_levels"])
+    stats["tokens"] = stats.get("tokens", 0) + sum(level["tokens"] for level in stats["reduce_levels"])
+    return summary
+
+
+def summarize(text: str, llm, model_id: Optional[str], summary_type: str = "concise",
+              max_workers: int = SUMMARY_MAP_CONCURRENCY, stats: Optional[Dict] = None) -> str:
+    """Map-reduce summary of text, with chunks sized for model_id and summarized concurrently
+
+    Text that fits in one request is summarized with a single call. If
+    stats is given it is filled with the number of chunks, the reduce
+    tree's levels, and the Groq calls made and text tokens sent.
+    """
+    stats = {} if stats is None else stats
+    stats.update(calls=0, tokens=0)
+    parts = map_text(text, llm, model_id, max_workers, stats)
+    return combine_summaries(llm, parts, summary_type, model_id, max_workers, stats)
+
+
+def summarize_source(source: str, fetch: Callable[[], Optional[str]], llm, model_id: str,
+                     summary_type: str = "concise", refresh: bool = False,
+                     max_workers: int = SUMMARY_MAP_CONCURRENCY, stats: Optional[Dict] = None) -> Optional[str]:
+    """Summary of the text fetch() returns for source, e.g. a video id or URL, through the summary cache
+
+    A cached summary of the same type and model is returned without
+    fetching; with cached chunk summaries only the reduce step runs.
+    refresh ignores both and replaces them. Returns None if fetch() does.
+    stats["cached"] says which of "summary", "chunks" or None was used.
+    """
+    stats = {} if stats is None else stats
+    stats.update(calls=0, tokens=0, cached=None)
+    cache = get_summary_cache() if SUMMARY_CACHE_ENABLED else None
+    parts = None
+    if cache is not None and not refresh:
+        with span("summary_cache") as cache_span:
+            summary = cache.get_summary(source, model_id, summary_type)
+            if summary is None:
+                parts = cache.get_chunk_summaries(source, model_id)
+            stats["cached"] = "summary" if summary is not None else "chunks" if parts is not None else None
+            cache_span.set(cached=stats["cached"])
+        if summary is not None:
+            return summary
+
+    if parts is None:
+        text = fetch()
+        if not text:
+            return None
+        parts = map_text(text, llm, model_id, max_workers, stats)
+        if cache is not None:
+            cache.put_chunk_summaries(source, model_id, parts)
+    summary = combine_summaries(llm, parts, summary_type, model_id, max_workers, stats)
+    if cache is not None:
+        cache.put_summary(source, model_id, summary_type, summary)
+    return summary
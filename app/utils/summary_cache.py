@@ -0,0 +1,117 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config import SUMMARY_CACHE_MAX_ENTRIES, SUMMARY_CACHE_PATH, SUMMARY_CACHE_TTL_SECONDS
+
+# Kind under which the chunk summaries of a source are stored, next to one entry per summary type
+CHUNK_SUMMARIES = "chunks"
+
+
+class SummaryCache:
+    """Summaries of URLs in a local SQLite file, keyed on (source, model, kind)
+
+    kind is a summary type for final summaries, or CHUNK_SUMMARIES for the
+    per-chunk summaries they were reduced from, so a new summary type of a
+    known source only needs the reduce step. Entries expire after ttl and
+    the least recently used are evicted beyond max_entries.
+    """
+
+    def __init__(self, path: str, ttl: float = SUMMARY_CACHE_TTL_SECONDS,
+                 max_entries: int = SUMMARY_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS summaries (source TEXT NOT NULL, model TEXT NOT NULL, kind TEXT NOT NULL, "
+            "value TEXT, created REAL, last_used REAL, PRIMARY KEY (source, model, kind))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used)")
+        self._db.commit()
+
+    def _get(self, source: str, model: str, kind: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, created FROM summaries WHERE source = ? AND model = ? AND kind = ?",
+                (source, model, kind)
+            ).fetchone()
+            if row is not None and time.time() - row[1] > self.ttl:
+                self._db.execute(
+                    "DELETE FROM summaries WHERE source = ? AND model = ? AND kind = ?", (source, model, kind)
+                )
+                self._db.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute(
+                "UPDATE summaries SET last_used = ? WHERE source = ? AND model = ? AND kind = ?",
+                (time.time(), source, model, kind)
+            )
+            self._db.commit()
+            return json.loads(row[0])
+
+    def _put(self, source: str, model: str, kind: str, value) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?)",
+                (source, model, kind, json.dumps(value), now, now)
+            )
+            excess = len(self) - self.max_entries
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM summaries WHERE rowid IN (SELECT rowid FROM summaries ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+            self._db.commit()
+
+    def get_summary(self, source: str, model: str, summary_type: str) -> Optional[str]:
+        """Final summary of a source, or None"""
+        return self._get(source, model, summary_type)
+
+    def put_summary(self, source: str, model: str, summary_type: str, summary: str) -> None:
+        self._put(source, model, summary_type, summary)
+
+    def get_chunk_summaries(self, source: str, model: str) -> Optional[List[str]]:
+        """Summaries of a source's chunks, or its text if it fit one request, or None"""
+        return self._get(source, model, CHUNK_SUMMARIES)
+
+    def put_chunk_summaries(self, source: str, model: str, summaries: List[str]) -> None:
+        self._put(source, model, CHUNK_SUMMARIES, summaries)
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    def stats(self) -> Dict[str, float]:
+        """Hits, misses and entries"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_summary_cache() -> SummaryCache:
+    """Return the process-wide summary cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SummaryCache(SUMMARY_CACHE_PATH)
+        return _cache
@@ -0,0 +1,138 @@
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import accumulate
+from typing import List, Optional, Tuple
+
+import tiktoken
+
+from config import (
+    GROQ_MODELS,
+    DEFAULT_CONTEXT_LENGTH,
+    PROMPT_OVERHEAD_TOKENS,
+    RAG_CONTEXT_FRACTION,
+    RAG_CHUNK_TOKENS_RANGE,
+    RETRIEVER_K,
+    SUMMARY_OUTPUT_TOKENS,
+    SUMMARY_TOKEN_MARGIN,
+    TOKENIZER_ENCODING,
+)
+from utils.scheduler import rate_limits_for
+
+# Separators a chunk may end on, strongest first
+_BOUNDARIES = (b"\n\n", b"\n", b". ", b" ")
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(encoding_name: str = TOKENIZER_ENCODING) -> tiktoken.Encoding:
+    """Load a tokenizer once per process"""
+    return tiktoken.get_encoding(encoding_name)
+
+
+def count_tokens(text: str) -> int:
+    """Count the tokens in a piece of text"""
+    return len(get_tokenizer().encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to at most max_tokens tokens"""
+    tokens = get_tokenizer().encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return get_tokenizer().decode(tokens[:max(0, max_tokens)])
+
+
+def context_length_for(model_id: Optional[str]) -> int:
+    """Look up the context window of a model by its Groq id"""
+    for model in GROQ_MODELS.values():
+        if model["id"] == model_id:
+            return model["context_length"]
+    return DEFAULT_CONTEXT_LENGTH
+
+
+def rag_chunk_sizes(model_id: Optional[str]) -> Tuple[int, int]:
+    """Chunk size and overlap, in tokens, for retrieval chunks of a model"""
+    low, high = RAG_CHUNK_TOKENS_RANGE
+    # Leave room for RETRIEVER_K retrieved chunks plus the question and history
+    budget = int(context_length_for(model_id) * RAG_CONTEXT_FRACTION) // RETRIEVER_K
+    chunk_tokens = max(low, min(high, budget))
+    return chunk_tokens, chunk_tokens // 5
+
+
+def summary_chunk_sizes(model_id: Optional[str]) -> Tuple[int, int]:
+    """Chunk size and overlap, in tokens, for summarization chunks of a model
+
+    A chunk fills as much of one request as the prompt and the summary
+    it asks for leave free, so large-context models need few calls, but
+    never more than the model's tokens-per-minute limit lets through at once.
+    """
+    context = context_length_for(model_id)
+    output_tokens = min(SUMMARY_OUTPUT_TOKENS, context // 4)
+    limit = min(context, rate_limits_for(model_id)[1])
+    usable = limit - PROMPT_OVERHEAD_TOKENS - output_tokens
+    chunk_tokens = int(usable * SUMMARY_TOKEN_MARGIN)
+    return chunk_tokens, min(200, chunk_tokens // 10)
+
+
+class TokenChunker:
+    """Split text into windows of at most chunk_tokens tokens, preferring natural boundaries"""
+
+    def __init__(self, chunk_tokens: int, overlap_tokens: int = 0, boundary_slack: float = 0.15):
+        if overlap_tokens >= chunk_tokens:
+            raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.boundary_slack = boundary_slack
+
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunks"""
+        if not text:
+            return []
+        tokenizer = get_tokenizer()
+        tokens = tokenizer.encode(text, disallowed_special=())
+        if len(tokens) <= self.chunk_tokens:
+            return [text] if text.strip() else []
+
+        # Cumulative byte lengths map every token to its position in the UTF-8
+        # text, so chunks are slices of the original rather than re-decoded tokens
+        data = text.encode("utf-8")
+        offsets = [0]
+        offsets.extend(accumulate(map(len, tokenizer.decode_tokens_bytes(tokens))))
+
+        chunks = []
+        start = 0
+        n_tokens = len(tokens)
+        while start < n_tokens:
+            end = min(start + self.chunk_tokens, n_tokens)
+            if end < n_tokens:
+                end = self._snap_to_boundary(data, offsets, start, end)
+            # A window edge can split a multi-byte character; drop the fragment
+            chunk = data[offsets[start]:offsets[end]].decode("utf-8", errors="ignore").strip()
+            if chunk:
+                chunks.append(chunk)
+            if end >= n_tokens:
+                break
+            start = max(end - self.overlap_tokens, start + 1)
+        return chunks
+
+    def _snap_to_boundary(self, data: bytes, offsets: List[int], start: int, end: int) -> int:
+        """Pull the window end back to the strongest separator inside the slack region"""
+        slack = max(1, int((end - start) * self.boundary_slack))
+        lo = offsets[max(start + 1, end - slack)]
+        hi = offsets[end]
+        for separator in _BOUNDARIES:
+            pos = data.rfind(separator, lo, hi)
+            if pos == -1:
+                continue
+            # Cut after any punctuation in the separator, at the first token that
+            # starts inside it; tokenizers often glue the space onto the next word
+            cut = pos + len(separator.rstrip())
+            snapped = bisect_left(offsets, cut, start + 1, end)
+            if snapped < end and offsets[snapped] <= pos + len(separator):
+                return snapped
+        return end
+
+
+@lru_cache(maxsize=32)
+def get_chunker(chunk_tokens: int, overlap_tokens: int) -> TokenChunker:
+    """Reuse chunkers across calls with the same sizes"""
+    return TokenChunker(chunk_tokens, overlap_tokens)
@@ -0,0 +1,218 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from config import METRICS_PATH, TRACE_LOG_PATH, TRACING_ENABLED
+
+# Attributes summed into the exported metrics; any others are kept on the span only
+METRIC_ATTRIBUTES = ("tokens_in", "tokens_out", "prompt_tokens", "cache_hits", "cache_misses")
+
+# (total, Prometheus counter, help) for each exported total
+_METRIC_FAMILIES = (
+    ("seconds", "app_stage_seconds_total", "Wall time spent in each stage"),
+    ("count", "app_stage_calls_total", "Times each stage ran"),
+    ("tokens_in", "app_stage_tokens_in_total", "Prompt tokens sent by each stage"),
+    ("tokens_out", "app_stage_tokens_out_total", "Completion tokens received by each stage"),
+    ("prompt_tokens", "app_stage_prompt_tokens_total", "Chat prompt tokens (question, history and context) per stage"),
+    ("cache_hits", "app_stage_cache_hits_total", "Cache hits in each stage"),
+    ("cache_misses", "app_stage_cache_misses_total", "Cache misses in each stage"),
+)
+
+
+class Span:
+    """One timed stage of a request, with attributes such as tokens and cache hits"""
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, **attrs):
+        self.name = name
+        self.parent = parent
+        self.attrs: Dict[str, Any] = dict(attrs)
+        self.children: List["Span"] = []
+        self.start = time.perf_counter()
+        self.seconds = 0.0
+        # Times a merged span was entered
+        self.count = 0
+
+    def set(self, **attrs) -> None:
+        """Set attributes; numeric metric attributes add up"""
+        for key, value in attrs.items():
+            if key in METRIC_ATTRIBUTES and isinstance(self.attrs.get(key), (int, float)):
+                self.attrs[key] += value
+            else:
+                self.attrs[key] = value
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        origin = self.start if origin is None else origin
+        return {
+            "name": self.name,
+            "offset_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.seconds * 1000, 3),
+            "count": self.count,
+            "attrs": self.attrs,
+            "children": [child.to_dict(origin) for child in self.children],
+        }
+
+    def walk(self, depth: int = 0) -> Iterator[tuple]:
+        """Yield (depth, span) for this span and everything under it"""
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+class _Metrics:
+    """Running totals per span name, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, float]] = {}
+
+    def add(self, name: str, seconds: float, values: Dict[str, float]) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(name, {"count": 0, "seconds": 0.0})
+            totals["count"] += 1
+            totals["seconds"] += seconds
+            for key, value in values.items():
+                totals[key] = totals.get(key, 0) + value
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: dict(totals) for name, totals in self._totals.items()}
+
+    def render(self) -> str:
+        snapshot = sorted(self.snapshot().items())
+        lines = []
+        for key, family, help_text in _METRIC_FAMILIES:
+            values = [(name, totals[key]) for name, totals in snapshot if key in totals]
+            if not values:
+                continue
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} counter")
+            for name, value in values:
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{family}{{stage="{label}"}} {round(value, 6)}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = _Metrics()
+_export_lock = threading.Lock()
+
+
+def _metric_values(span: Span) -> Dict[str, float]:
+    return {
+        key: value for key, value in ((key, span.attrs.get(key)) for key in METRIC_ATTRIBUTES)
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+
+def _finish(span: Span, seconds: float, before: Dict[str, float]) -> None:
+    span.seconds += seconds
+    span.count += 1
+    # A merged span carries totals from earlier entries; export only what this one added
+    values = {key: value - before.get(key, 0) for key, value in _metric_values(span).items()}
+    metrics.add(span.name, seconds, values)
+
+
+@contextmanager
+def span(name: str, merge: bool = False, **attrs) -> Iterator[Span]:
+    """Time a stage of the current request
+
+    With merge, repeated spans of the same name under one parent (e.g.
+    one per embedding batch) add up into a single span.
+    """
+    parent = _current.get()
+    if not TRACING_ENABLED:
+        yield Span(name, parent, **attrs)
+        return
+    current = None
+    if merge and parent is not None:
+        current = next((child for child in parent.children if child.name == name), None)
+    if current is None:
+        before = {}
+        current = Span(name, parent, **attrs)
+        if parent is not None:
+            parent.children.append(current)
+    else:
+        before = _metric_values(current)
+        current.set(**attrs)
+    _current.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        # Set rather than reset: a generator may be closed from another context
+        _current.set(parent)
+        _finish(current, time.perf_counter() - start, before)
+
+
+def record(**attrs) -> None:
+    """Add attributes such as tokens or cache hits to the current span, if any"""
+    current = _current.get()
+    if current is not None:
+        current.set(**attrs)
+
+
+def traced_iter(iterable: Iterable, name: str) -> Iterator:
+    """Yield from iterable, timing only the work of producing each item as one merged span
+
+    For pipelined generators, where a stage's time is spent inside the
+    next() calls of the stage after it.
+    """
+    iterator = iter(iterable)
+    while True:
+        with span(name, merge=True):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+@contextmanager
+def trace(name: str, **attrs) -> Iterator[Span]:
+    """Trace one user request; its spans are exported as JSON lines and metrics when it ends"""
+    previous = _current.get()
+    # A new root, even if some other request is being traced in this context
+    _current.set(None)
+    root = None
+    try:
+        with span(name, **attrs) as root:
+            yield root
+    finally:
+        _current.set(previous)
+        if TRACING_ENABLED and root is not None:
+            _export(root)
+
+
+def waterfall(root: Span, width: int = 32) -> str:
+    """Plain-text waterfall of a trace: one line per span with its bar, duration and attributes"""
+    total = root.seconds or 1e-9
+    lines = []
+    for depth, node in root.walk():
+        offset = int((node.start - root.start) / total * width)
+        length = max(1, round(node.seconds / total * width))
+        bar = " " * min(offset, width - 1) + "█" * min(length, width - min(offset, width - 1))
+        label = "  " * depth + node.name + (f" ×{node.count}" if node.count > 1 else "")
+        attrs = " ".join(f"{key}={value}" for key, value in node.attrs.items())
+        lines.append(f"{label:<28} {bar:<{width}} {node.seconds * 1000:9.1f} ms  {attrs}".rstrip())
+    return "\n".join(lines)
+
+
+def _export(root: Span) -> None:
+    with _export_lock:
+        if TRACE_LOG_PATH:
+            os.makedirs(os.path.dirname(TRACE_LOG_PATH) or ".", exist_ok=True)
+            with open(TRACE_LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"time": time.time(), **root.to_dict()}, default=str) + "\n")
+        if METRICS_PATH:
+            # Written whole and renamed, as a Prometheus textfile collector expects
+            os.makedirs(os.path.dirname(METRICS_PATH) or ".", exist_ok=True)
+            tmp_path = f"{METRICS_PATH}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(metrics.render())
+            os.replace(tmp_path, METRICS_PATH)
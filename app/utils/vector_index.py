@@ -0,0 +1,349 @@
+import copy
+import hashlib
+import math
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+from config import (
+    ANN_FLAT_MAX_VECTORS,
+    ANN_HNSW_MAX_VECTORS,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_EF_SEARCH,
+    HNSW_M,
+    HYBRID_SEARCH_ENABLED,
+    IVF_NPROBE_FRACTION,
+    PQ_SUB_DIMS,
+    RAG_CHUNK_TOKENS_RANGE,
+    RESCORE_FACTOR,
+    RETRIEVER_K,
+    VECTOR_STORAGE,
+)
+from utils.bm25 import BM25Index
+from utils.retrieval import HybridRetriever
+
+# IVF centroids are trained on at most this many vectors per list
+_IVF_TRAINING_POINTS_PER_LIST = 64
+# Scalar and product quantizers are trained on up to this many vectors
+_QUANTIZER_TRAINING_POINTS = 65536
+# Below this, 256-centroid PQ codebooks can't be trained well; use SQ8 instead
+_PQ_MIN_VECTORS = 10000
+
+# Factory suffix for each storage precision, as used after "Flat"/"HNSW"/"IVF"
+_STORAGE_CODES = {"float32": "Flat", "float16": "SQfp16", "sq8": "SQ8"}
+
+
+def document_key(data: bytes) -> str:
+    """Content hash identifying an uploaded document"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def choose_index_spec(n_vectors: int, dim: Optional[int] = None, storage: str = VECTOR_STORAGE) -> Dict:
+    """Pick an exact, graph or inverted-file index for a corpus size, stored at the given precision"""
+    if storage == "pq" and (n_vectors < _PQ_MIN_VECTORS or not dim or dim % PQ_SUB_DIMS):
+        storage = "sq8"
+    if storage not in _STORAGE_CODES and storage != "pq":
+        raise ValueError(f"Unknown vector storage {storage!r}")
+    code = f"PQ{dim // PQ_SUB_DIMS}" if storage == "pq" else _STORAGE_CODES[storage]
+
+    if n_vectors <= ANN_FLAT_MAX_VECTORS:
+        return {"kind": "flat", "storage": storage, "factory": code, "params": {}}
+    if n_vectors <= ANN_HNSW_MAX_VECTORS:
+        return {
+            "kind": "hnsw",
+            "storage": storage,
+            "factory": f"HNSW{HNSW_M}" if storage == "float32" else f"HNSW{HNSW_M}_{code}",
+            "params": {"M": HNSW_M, "efConstruction": HNSW_EF_CONSTRUCTION, "efSearch": HNSW_EF_SEARCH},
+        }
+    # Roughly 4 * sqrt(n) lists, rounded to a power of two, while leaving
+    # k-means the ~40 training points per centroid it wants
+    nlist = min(2 ** round(math.log2(4 * math.sqrt(n_vectors))), 2 ** int(math.log2(n_vectors / 40)))
+    return {
+        "kind": "ivf",
+        "storage": storage,
+        "factory": f"IVF{nlist},{code}",
+        "params": {"nlist": nlist, "nprobe": max(1, int(nlist * IVF_NPROBE_FRACTION))},
+    }
+
+
+def index_kind(index) -> str:
+    """Classify a FAISS index as flat, hnsw or ivf"""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def index_storage(index) -> str:
+    """Precision an index stores its vectors at: float32, float16, sq8 or pq"""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    if isinstance(index, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+        return "pq"
+    if isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        return "float16" if index.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "sq8"
+    return "float32"
+
+
+def bytes_per_vector(index) -> float:
+    """Approximate index memory per stored vector, including graph links and list ids"""
+    index = faiss.downcast_index(index)
+    if index.ntotal == 0:
+        return 0.0
+    if isinstance(index, faiss.IndexHNSW):
+        # Neighbour lists are int32 ids
+        links = index.hnsw.neighbors.size() * 4 / index.ntotal
+        return faiss.downcast_index(index.storage).code_size + links
+    if isinstance(index, faiss.IndexIVF):
+        # Each code sits in its inverted list next to an int64 id
+        return index.code_size + 8
+    return index.code_size
+
+
+def full_precision_vectors(embeddings, texts: List[str]) -> List[Optional[np.ndarray]]:
+    """Original float32 embeddings of texts from the embedding cache, or None where unavailable"""
+    cache = getattr(embeddings, "cache", None)
+    if cache is None:
+        return [None] * len(texts)
+    return cache.get_many(texts, record_stats=False)
+
+
+class RescoringFAISS(FAISS):
+    """FAISS store that re-ranks candidates from a compressed index by exact distance"""
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, filter=None, fetch_k=20, **kwargs):
+        if index_storage(self.index) == "float32":
+            return super().similarity_search_with_score_by_vector(
+                embedding, k, filter=filter, fetch_k=fetch_k, **kwargs
+            )
+        candidates = super().similarity_search_with_score_by_vector(
+            embedding, k * RESCORE_FACTOR, filter=filter, fetch_k=max(fetch_k, k * RESCORE_FACTOR), **kwargs
+        )
+        query = np.asarray(embedding, dtype=np.float32)
+        vectors = full_precision_vectors(self.embedding_function, [doc.page_content for doc, _ in candidates])
+        # Fall back to the approximate distance for vectors the cache has evicted
+        rescored = [
+            (doc, float(np.sum((vector - query) ** 2)) if vector is not None else score)
+            for (doc, score), vector in zip(candidates, vectors)
+        ]
+        rescored.sort(key=lambda item: item[1])
+        return rescored[:k]
+
+
+def build_index(vectors: np.ndarray, spec: Dict):
+    """Build, train and fill a FAISS index following a spec from choose_index_spec"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    index = faiss.index_factory(vectors.shape[1], spec["factory"])
+    params = spec["params"]
+    if spec["kind"] == "hnsw":
+        faiss.downcast_index(index).hnsw.efConstruction = params["efConstruction"]
+    if not index.is_trained:
+        sample_size = min(
+            len(vectors), max(params.get("nlist", 0) * _IVF_TRAINING_POINTS_PER_LIST, _QUANTIZER_TRAINING_POINTS)
+        )
+        sample = vectors[np.random.default_rng(0).choice(len(vectors), sample_size, replace=False)]
+        index.train(sample)
+    if spec["kind"] == "ivf":
+        # Keeps reconstruction possible for later rebuilds
+        faiss.extract_index_ivf(index).set_direct_map_type(faiss.DirectMap.Hashtable)
+    index.add(vectors)
+    apply_search_params(index, spec)
+    return index
+
+
+def apply_search_params(index, spec: Dict) -> None:
+    """Set query-time parameters (efSearch, nprobe) on an index"""
+    params = spec["params"]
+    if spec["kind"] == "hnsw":
+        faiss.downcast_index(index).hnsw.efSearch = params["efSearch"]
+    elif spec["kind"] == "ivf":
+        faiss.extract_index_ivf(index).nprobe = params["nprobe"]
+
+
+def all_vectors(index) -> np.ndarray:
+    """Reconstruct every stored vector, in id order"""
+    if index_kind(index) == "ivf":
+        ivf = faiss.extract_index_ivf(index)
+        if ivf.direct_map.type == faiss.DirectMap.NoMap:
+            ivf.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+class DocumentIndex:
+    """FAISS vector store that tracks which documents it holds, so they can be added and removed one by one"""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.vectorstore: Optional[FAISS] = None
+        # content hash -> {"name": file name, "ids": docstore ids of its chunks,
+        # "chunk_tokens": size in tokens the document was split into}
+        self.documents: Dict[str, dict] = {}
+        # Keyword index over the same chunks, keyed by docstore id
+        self.lexical = BM25Index()
+        # Snapshots loaded from disk are memory-mapped and shared between
+        # sessions; they are copied the first time this session modifies them
+        self.shared = False
+        self.load_seconds = None
+        self.index_spec: Optional[Dict] = None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.documents
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @property
+    def chunk_count(self) -> int:
+        return sum(len(doc["ids"]) for doc in self.documents.values())
+
+    @property
+    def chunk_tokens(self) -> int:
+        """Largest chunk size, in tokens, of the indexed documents"""
+        # Documents indexed before sizes were recorded count as the largest chunk size allowed
+        return max((doc.get("chunk_tokens", RAG_CHUNK_TOKENS_RANGE[1])
+                    for doc in self.documents.values() if doc["ids"]), default=0)
+
+    def _ensure_private(self) -> None:
+        """Copy a shared, memory-mapped vectorstore before modifying it"""
+        if not self.shared or self.vectorstore is None:
+            self.shared = False
+            return
+        shared = self.vectorstore
+        # A mapped index can't grow in place; a serialize round-trip owns its data
+        index = faiss.deserialize_index(faiss.serialize_index(shared.index))
+        self.vectorstore = RescoringFAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=InMemoryDocstore(shared.docstore.to_dict()),
+            index_to_docstore_id=dict(shared.index_to_docstore_id),
+        )
+        self.lexical = copy.deepcopy(self.lexical)
+        self.shared = False
+
+    def add_chunks(self, key: str, name: str, chunks: List[str], chunk_tokens: Optional[int] = None) -> List[str]:
+        """Embed a batch of chunks belonging to a document and add them to the index
+
+        chunk_tokens is the size the chunks were split to, kept so prompts
+        can leave room for retrieved chunks of this document.
+        """
+        doc = self.documents.setdefault(key, {"name": name, "ids": []})
+        if not chunks:
+            return []
+        if chunk_tokens is not None:
+            doc["chunk_tokens"] = max(doc.get("chunk_tokens", 0), chunk_tokens)
+        self._ensure_private()
+        ids = [uuid.uuid4().hex for _ in chunks]
+        metadatas = [{"source": name, "doc_key": key} for _ in chunks]
+        if self.vectorstore is None:
+            self.vectorstore = RescoringFAISS.from_texts(
+                texts=chunks, embedding=self.embeddings, metadatas=metadatas, ids=ids
+            )
+        else:
+            self.vectorstore.add_texts(chunks, metadatas=metadatas, ids=ids)
+        self.lexical.add(ids, chunks)
+        doc["ids"].extend(ids)
+        return ids
+
+    def remove_document(self, key: str) -> int:
+        """Delete every vector of a document; returns how many were removed"""
+        doc = self.documents.pop(key, None)
+        if doc is None:
+            return 0
+        if doc["ids"] and self.vectorstore is not None:
+            if self.chunk_count == 0:
+                # Nothing left to search, drop the index instead of keeping an empty one
+                self.vectorstore = None
+                self.lexical = BM25Index()
+                self.shared = False
+            else:
+                if isinstance(faiss.downcast_index(self.vectorstore.index), faiss.IndexFlatCodes):
+                    self._ensure_private()
+                    self.vectorstore.delete(doc["ids"])
+                else:
+                    # Graph and inverted-file indexes can't compact ids in place, so
+                    # rebuild, picking the index type for the smaller corpus
+                    self._rebuild(choose_index_spec(self.chunk_count, self.vectorstore.index.d), drop=set(doc["ids"]))
+                self.lexical.remove(doc["ids"])
+        return len(doc["ids"])
+
+    def _rebuild(self, spec: Dict, drop=frozenset()) -> None:
+        """Rebuild the FAISS index with spec, optionally leaving out some docstore ids"""
+        vectorstore = self.vectorstore
+        positions = sorted(vectorstore.index_to_docstore_id)
+        keep = [i for i in positions if vectorstore.index_to_docstore_id[i] not in drop]
+        kept_ids = [vectorstore.index_to_docstore_id[i] for i in keep]
+        docstore = vectorstore.docstore
+        docs = docstore.to_dict() if hasattr(docstore, "to_dict") else dict(docstore._dict)
+        vectors = all_vectors(vectorstore.index)[keep]
+        if index_storage(vectorstore.index) != "float32":
+            # Retrain from the original embeddings rather than their lossy codes
+            exact = full_precision_vectors(self.embeddings, [docs[doc_id].page_content for doc_id in kept_ids])
+            for row, vector in enumerate(exact):
+                if vector is not None:
+                    vectors[row] = vector
+        self.vectorstore = RescoringFAISS(
+            embedding_function=self.embeddings,
+            index=build_index(vectors, spec),
+            docstore=InMemoryDocstore({doc_id: docs[doc_id] for doc_id in kept_ids}),
+            index_to_docstore_id=dict(enumerate(kept_ids)),
+        )
+        if self.shared:
+            self.lexical = copy.deepcopy(self.lexical)
+        self.index_spec = spec
+        self.shared = False
+
+    def optimize(self) -> Optional[Dict]:
+        """Switch to the index type and storage recommended for the current corpus size; returns the new spec if it changed"""
+        if self.vectorstore is None:
+            return None
+        index = self.vectorstore.index
+        spec = choose_index_spec(index.ntotal, index.d)
+        if (spec["kind"], spec["storage"]) == (index_kind(index), index_storage(index)):
+            if self.index_spec is None:
+                self.index_spec = spec
+            return None
+        self._rebuild(spec)
+        return spec
+
+    def as_retriever(self, k: int = RETRIEVER_K):
+        """Hybrid dense + BM25 retriever over the index, or plain dense search when hybrid search is off"""
+        if HYBRID_SEARCH_ENABLED and len(self.lexical):
+            return HybridRetriever(vectorstore=self.vectorstore, lexical=self.lexical, k=k)
+        return self.vectorstore.as_retriever(search_kwargs={"k": k})
+
+    def index_info(self) -> Dict:
+        """Index type, parameters and size, for display"""
+        if self.vectorstore is None:
+            return {"kind": None, "storage": None, "params": {}, "vectors": 0, "bytes_per_vector": 0.0, "dim": 0}
+        index = self.vectorstore.index
+        params = self.index_spec["params"] if self.index_spec else {}
+        return {
+            "kind": index_kind(index),
+            "storage": index_storage(index),
+            "params": params,
+            "vectors": index.ntotal,
+            "bytes_per_vector": bytes_per_vector(index),
+            "dim": index.d,
+        }
+
+    def sync(self, keys: Iterable[str], candidates: Optional[Iterable[str]] = None) -> List[str]:
+        """Remove documents that are no longer among keys; returns the removed names
+
+        Only documents in candidates are considered when it is given, so
+        documents that came from a saved snapshot aren't dropped just because
+        they were never uploaded in this session.
+        """
+        keep = set(keys)
+        managed = set(self.documents if candidates is None else candidates)
+        removed = []
+        for key in [key for key in self.documents if key not in keep and key in managed]:
+            removed.append(self.documents[key]["name"])
+            self.remove_document(key)
+        return removed
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    WEB_CACHE_DIR,
+    WEB_CACHE_ENABLED,
+    WEB_CACHE_FRESH_SECONDS,
+    WEB_CACHE_MAX_MB,
+    WEB_CONNECT_TIMEOUT_SECONDS,
+    WEB_FETCH_DEADLINE_SECONDS,
+    WEB_MAX_MB,
+    WEB_POOL_SIZE,
+    WEB_READ_TIMEOUT_SECONDS,
+    WEB_USER_AGENT,
+)
+from utils.disk_lru import evict, touch
+
+_CHARSET_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)", re.IGNORECASE)
+
+
+class Page:
+    """A fetched page: its bytes, the charset its headers declare, and where it came from"""
+
+    def __init__(self, url: str, status: int, content: bytes, encoding: Optional[str], source: str):
+        self.url = url
+        self.status = status
+        self.content = content
+        self.encoding = encoding
+        # "network", "cache" (still fresh) or "revalidated" (304 Not Modified)
+        self.source = source
+
+
+class WebFetcher:
+    """GET pages over a shared keep-alive session with timeouts, a size cap and an on-disk cache
+
+    Cached pages are served as is while fresh, then revalidated with
+    If-None-Match / If-Modified-Since so an unchanged page costs a 304
+    instead of a download. The cache directory is evicted least recently
+    used first beyond max_cache_bytes.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = WEB_CACHE_DIR,
+                 max_cache_bytes: int = int(WEB_CACHE_MAX_MB * 1024 * 1024),
+                 max_bytes: int = int(WEB_MAX_MB * 1024 * 1024),
+                 timeout: Tuple[float, float] = (WEB_CONNECT_TIMEOUT_SECONDS, WEB_READ_TIMEOUT_SECONDS),
+                 deadline: float = WEB_FETCH_DEADLINE_SECONDS, fresh_seconds: float = WEB_CACHE_FRESH_SECONDS,
+                 pool_size: int = WEB_POOL_SIZE):
+        self.cache_dir = cache_dir
+        self.max_cache_bytes = max_cache_bytes
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.deadline = deadline
+        self.fresh_seconds = fresh_seconds
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = WEB_USER_AGENT
+        self._lock = threading.Lock()
+        self.downloads = 0
+        self.cache_hits = 0
+        self.revalidated = 0
+        self.evictions = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def fetch(self, url: str, refresh: bool = False) -> Page:
+        """GET url, from the cache while fresh; refresh revalidates a cached page regardless
+
+        Raises requests exceptions for connection errors, timeouts and
+        error statuses, and ValueError for pages over max_bytes.
+        """
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        cached = self._load(key) if self.cache_dir else None
+        if cached is not None and not refresh and time.time() < self._fresh_until(cached[0]):
+            with self._lock:
+                self.cache_hits += 1
+            return self._page(cached, "cache")
+
+        headers = {}
+        if cached is not None:
+            if cached[0].get("etag"):
+                headers["If-None-Match"] = cached[0]["etag"]
+            if cached[0].get("last_modified"):
+                headers["If-Modified-Since"] = cached[0]["last_modified"]
+
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            if response.status_code == 304 and cached is not None:
+                # Read the empty body so the connection goes back to the pool
+                response.content
+                meta = dict(cached[0], fetched=time.time(), max_age=self._max_age(response.headers))
+                self._store(key, meta, cached[1])
+                with self._lock:
+                    self.revalidated += 1
+                return self._page((meta, cached[1]), "revalidated")
+            response.raise_for_status()
+            content = self._read(response)
+            match = _CHARSET_RE.search(response.headers.get("Content-Type", ""))
+            meta = {
+                "url": response.url,
+                "status": response.status_code,
+                "encoding": match.group(1) if match else None,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched": time.time(),
+                "max_age": self._max_age(response.headers),
+            }
+        with self._lock:
+            self.downloads += 1
+        if self.cache_dir and "no-store" not in response.headers.get("Cache-Control", "").lower():
+            self._store(key, meta, content)
+        return self._page((meta, content), "network")
+
+    def _read(self, response: requests.Response) -> bytes:
+        """Download the body, giving up past max_bytes or the overall deadline"""
+        length = response.headers.get("Content-Length")
+        if length and length.isdigit() and int(length) > self.max_bytes:
+            raise ValueError(f"Page is larger than {self.max_bytes // (1024 * 1024)} MB")
+        # The read timeout only bounds each read; read1 returns whatever has arrived, so a
+        # page trickling in is still cut off at the deadline
+        stop_at = time.monotonic() + self.deadline
+        parts, size = [], 0
+        while True:
+            part = response.raw.read1(64 * 1024, decode_content=True)
+            if not part:
+                break
+            size += len(part)
+            if size > self.max_bytes:
+                raise ValueError(f"Page is larger than {self.max_bytes // (1024 * 1024)} MB")
+            if time.monotonic() > stop_at:
+                raise requests.Timeout(f"Page took longer than {self.deadline:.0f}s to download")
+            parts.append(part)
+        return b"".join(parts)
+
+    @staticmethod
+    def _max_age(headers) -> Optional[float]:
+        """Seconds the server says the page stays fresh, or None if it doesn't say"""
+        cache_control = headers.get("Cache-Control", "").lower()
+        if "no-cache" in cache_control:
+            return 0.0
+        match = _MAX_AGE_RE.search(cache_control)
+        return float(match.group(1)) if match else None
+
+    def _fresh_until(self, meta: Dict) -> float:
+        max_age = meta.get("max_age")
+        return meta["fetched"] + (self.fresh_seconds if max_age is None else max_age)
+
+    @staticmethod
+    def _page(entry, source: str) -> Page:
+        meta, content = entry
+        return Page(meta["url"], meta["status"], content, meta["encoding"], source)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.page")
+
+    def _load(self, key: str):
+        """(metadata, body) of a cached page, or None"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                meta = json.loads(f.readline())
+                content = f.read()
+            touch(path)
+        except (OSError, ValueError):
+            return None
+        return meta, content
+
+    def _store(self, key: str, meta: Dict, content: bytes) -> None:
+        """Write one line of JSON metadata followed by the body, then evict beyond the size cap"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(json.dumps(meta).encode("utf-8") + b"\n")
+            f.write(content)
+        os.replace(tmp_path, self._path(key))
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            self.evictions += evict(self.cache_dir, ".page", self.max_cache_bytes)
+
+    def stats(self) -> Dict[str, int]:
+        """Pages downloaded, served from the cache, and revalidated with a 304"""
+        with self._lock:
+            return {
+                "downloads": self.downloads,
+                "cache_hits": self.cache_hits,
+                "revalidated": self.revalidated,
+                "evictions": self.evictions,
+            }
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_web_fetcher() -> WebFetcher:
+    """Return the process-wide web fetcher"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = WebFetcher(WEB_CACHE_DIR if WEB_CACHE_ENABLED else None)
+        return _fetcher
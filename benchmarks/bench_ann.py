@@ -0,0 +1,69 @@
+"""Recall@k and query latency of the index chosen for each corpus size vs. exact search
+
+Vectors are clustered like real embeddings (random centroids plus noise);
+queries are perturbed copies of stored vectors. Building 1M HNSW/IVF
+indexes takes minutes and several GB of RAM, so pass smaller --sizes on
+small machines.
+
+Usage: python benchmarks/bench_ann.py [--sizes 1000 100000 1000000] [--dim 384] [--queries 200] [--k 10]
+"""
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+import synthetic  # noqa: F401  (puts app/ on sys.path)
+from utils.vector_index import build_index, choose_index_spec
+
+
+def make_vectors(n, dim, rng, n_clusters=256):
+    centroids = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, size=n)
+    vectors = centroids[labels] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def search_ms(index, queries, k):
+    start = time.perf_counter()
+    for query in queries:
+        # One query at a time, like the retriever
+        index.search(query[None, :], k)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'vectors':>9} {'index':<40} {'build s':>8} {'exact ms':>9} {'ann ms':>8} {'recall@' + str(args.k):>10}")
+    for n in args.sizes:
+        vectors = make_vectors(n, args.dim, rng)
+        picks = rng.choice(n, args.queries, replace=False)
+        queries = vectors[picks] + 0.05 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+
+        exact = faiss.IndexFlatL2(args.dim)
+        exact.add(vectors)
+        _, truth = exact.search(queries, args.k)
+        exact_ms = search_ms(exact, queries, args.k)
+
+        spec = choose_index_spec(n, args.dim)
+        start = time.perf_counter()
+        index = build_index(vectors, spec)
+        build_seconds = time.perf_counter() - start
+        _, found = index.search(queries, args.k)
+        ann_ms = search_ms(index, queries, args.k)
+        recall = np.mean([len(set(t) & set(f)) / args.k for t, f in zip(truth, found)])
+
+        params = ",".join(f"{k}={v}" for k, v in spec["params"].items())
+        label = f"{spec['kind']} {params}".strip()
+        print(f"{n:>9} {label:<40} {build_seconds:8.2f} {exact_ms:9.3f} {ann_ms:8.3f} {recall:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
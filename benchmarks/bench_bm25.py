@@ -0,0 +1,88 @@
+"""Build time and per-query latency of the BM25 keyword index used for hybrid retrieval
+
+Chunks draw words from a Zipf-distributed vocabulary, like natural text,
+with a part number in every tenth chunk; queries are either word samples
+from the same distribution or contain one of those identifiers. The
+reciprocal rank fusion step is timed separately since it runs on every
+hybrid query.
+
+Usage: python benchmarks/bench_bm25.py [--chunks 100000] [--words 180] [--queries 500]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from synthetic import WORDS
+from utils.bm25 import BM25Index
+from utils.retrieval import reciprocal_rank_fusion
+
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return f"p50 {np.percentile(ms, 50):6.2f} ms  p95 {np.percentile(ms, 95):6.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--words", type=int, default=180)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--k", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    np_rng = np.random.default_rng(0)
+    vocabulary = np.array(WORDS + [f"term{i}" for i in range(args.vocabulary - len(WORDS))])
+    weights = 1 / np.arange(1, len(vocabulary) + 1) ** 1.07
+    weights /= weights.sum()
+
+    def sample_words(n):
+        return vocabulary[np_rng.choice(len(vocabulary), n, p=weights)]
+
+    chunks, part_numbers = [], {}
+    for i in range(args.chunks):
+        chunk = " ".join(sample_words(args.words))
+        if i % 10 == 0:
+            part = f"{rng.choice('ABCDEFGH')}{rng.choice('XYZ')}-{rng.randrange(10000):04d}"
+            part_numbers[part] = str(i)
+            chunk += f" Replace with part {part}."
+        chunks.append(chunk)
+
+    index = BM25Index()
+    start = time.perf_counter()
+    index.add((str(i) for i in range(len(chunks))), chunks)
+    print(f"{args.chunks} chunks indexed in {time.perf_counter() - start:.1f}s")
+
+    parts = list(part_numbers)
+    queries = {
+        "words": [" ".join(sample_words(6)) for _ in range(args.queries)],
+        "identifier": [f"which {sample_words(1)[0]} uses {rng.choice(parts)}" for _ in range(args.queries)],
+    }
+    for label, batch in queries.items():
+        timings, found = [], 0
+        for query in batch:
+            start = time.perf_counter()
+            results = index.search(query, args.k)
+            timings.append(time.perf_counter() - start)
+            part = query.split()[-1]
+            found += bool(results) and results[0][0] == part_numbers.get(part)
+        line = f"{label:<11} {percentiles(timings)}"
+        if label == "identifier":
+            line += f"  exact part at rank 1: {found / len(batch):.0%}"
+        print(line)
+
+    dense = [[str(rng.randrange(args.chunks)) for _ in range(args.k)] for _ in range(args.queries)]
+    timings = []
+    for query, ranking in zip(queries["words"], dense):
+        lexical = [doc_id for doc_id, _ in index.search(query, args.k)]
+        start = time.perf_counter()
+        reciprocal_rank_fusion([ranking, lexical])
+        timings.append(time.perf_counter() - start)
+    print(f"{'rrf merge':<11} {percentiles(timings)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Throughput of the recursive splitter vs. the token chunker
+
+The character-measured splitter is the old get_text_chunks baseline; the
+token-measured one is what the recursive splitter costs once it has to
+respect a token budget, which is the like-for-like comparison.
+
+Usage: python benchmarks/bench_chunking.py [--mb 5] [--model mixtral-8x7b-32768]
+"""
+import argparse
+import time
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from synthetic import make_text
+from utils.text_chunker import TokenChunker, count_tokens, get_tokenizer, rag_chunk_sizes
+
+
+def timed(label, split, text):
+    start = time.perf_counter()
+    chunks = split(text)
+    elapsed = time.perf_counter() - start
+    size_mb = len(text) / (1024 * 1024)
+    sample = chunks[:: max(1, len(chunks) // 200)]
+    avg_tokens = sum(count_tokens(chunk) for chunk in sample) / len(sample)
+    print(f"{label:<28} {elapsed:7.2f}s {size_mb / elapsed:7.2f} MB/s "
+          f"{len(chunks):7d} chunks, ~{avg_tokens:.0f} tokens/chunk")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, default=5)
+    parser.add_argument("--model", default="mixtral-8x7b-32768")
+    args = parser.parse_args()
+
+    text = make_text(int(args.mb * 1024 * 1024 / 7))
+    print(f"{len(text) / (1024 * 1024):.1f} MB of text")
+
+    # Load the tokenizer up front; it is cached for the life of the process
+    start = time.perf_counter()
+    get_tokenizer()
+    print(f"tokenizer load: {time.perf_counter() - start:.2f}s (once per process)")
+
+    recursive = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, length_function=len)
+    timed("recursive 1000/200 chars", recursive.split_text, text)
+
+    recursive_tokens = RecursiveCharacterTextSplitter(
+        chunk_size=250, chunk_overlap=50, length_function=count_tokens
+    )
+    baseline = timed("recursive 250/50 tokens", recursive_tokens.split_text, text)
+
+    # Same chunk size as the baseline (~4 characters per token)
+    same_size = TokenChunker(250, 50)
+    elapsed = timed("token chunker 250/50", same_size.split_text, text)
+    print(f"{'':<28} {baseline / elapsed:.1f}x faster than token-measured recursive")
+
+    chunk_tokens, overlap_tokens = rag_chunk_sizes(args.model)
+    sized = TokenChunker(chunk_tokens, overlap_tokens)
+    timed(f"token {chunk_tokens}/{overlap_tokens} ({args.model})", sized.split_text, text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Concurrent identical Groq requests with and without single-flight coalescing
+
+Simulates a burst of sessions asking the same question at once against
+the local stand-in server and reports how many requests reached it.
+
+Usage: python benchmarks/bench_coalescing.py [--sessions 20] [--delay 0.5]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import synthetic  # noqa: F401  (puts app/ on sys.path)
+from groq_stub import start_stub_server
+
+
+def run(label, make_llm, sessions, server):
+    requests = server.requests
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(lambda i: make_llm(i).invoke("What is the leave policy?"), range(sessions)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed:6.2f}s  {server.requests - requests:4d} upstream requests")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.5)
+    args = parser.parse_args()
+
+    server = start_stub_server(args.delay)
+    os.environ["GROQ_BASE_URL"] = server.url
+    # Imported after GROQ_BASE_URL is set so the config picks it up
+    from langchain_groq import ChatGroq
+    from utils.llm_client import get_chat_model, llm_flights
+
+    run("independent calls", lambda i: ChatGroq(model="stub", groq_api_key="stub", base_url=server.url),
+        args.sessions, server)
+    # The app's key is shared by its sessions; calls under other keys are never shared
+    run("coalesced calls", lambda i: get_chat_model("stub", "key"), args.sessions, server)
+    run("one key per session", lambda i: get_chat_model("stub", f"key-{i}"), args.sessions, server)
+    print(f"coalesced: {llm_flights.stats()['coalesced']}")
+
+
+if __name__ == "__main__":
+    main()
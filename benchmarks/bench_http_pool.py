@@ -0,0 +1,45 @@
+"""Sequential ChatGroq calls through the shared connection pool vs. a fresh client per call
+
+Runs against the local stand-in server, so the numbers show connection
+setup cost without TLS; against api.groq.com each new connection also
+pays a TLS handshake, which the pooled client skips.
+
+Usage: python benchmarks/bench_http_pool.py [--calls 50] [--delay 0.0]
+"""
+import argparse
+import os
+import time
+
+import synthetic  # noqa: F401  (puts app/ on sys.path)
+from groq_stub import start_stub_server
+
+
+def run(label, make_llm, calls, server):
+    connections = server.connections
+    start = time.perf_counter()
+    for i in range(calls):
+        make_llm().invoke(f"summarize part {i}")
+    elapsed = time.perf_counter() - start
+    print(f"{label:<26} {elapsed / calls * 1000:8.2f} ms/call  "
+          f"{server.connections - connections:4d} connections opened")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = start_stub_server(args.delay)
+    os.environ["GROQ_BASE_URL"] = server.url
+    # Imported after GROQ_BASE_URL is set so the config picks it up
+    from langchain_groq import ChatGroq
+    from utils.llm_client import get_chat_model
+
+    run("fresh ChatGroq per call", lambda: ChatGroq(model="stub", groq_api_key="stub", base_url=server.url),
+        args.calls, server)
+    run("shared pooled client", lambda: get_chat_model("stub", "stub"), args.calls, server)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Load time and resident memory of saved index snapshots, memory-mapped vs. fully read
+
+Each load runs in a fresh subprocess so resident memory is measured from
+a clean baseline.
+
+Usage: python benchmarks/bench_index_store.py [--vectors 200000] [--dim 384]
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+
+def rss_mb() -> dict:
+    """Private (anonymous) and shared file-backed resident memory of this process (Linux)"""
+    usage = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("RssAnon:", "RssFile:")):
+                usage[line.split(":")[0]] = int(line.split()[1]) / 1024
+    return usage
+
+
+def delta(after: dict, before: dict) -> dict:
+    return {key: after[key] - before[key] for key in after}
+
+
+def child(mode: str, name: str, dim: int, queries: int) -> None:
+    import faiss
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from utils.index_store import SqliteDocstore, _snapshot_dir, load_index
+
+    embeddings = DeterministicFakeEmbedding(size=dim)
+    before = rss_mb()
+    start = time.perf_counter()
+    if mode == "mmap":
+        index = load_index(name, embeddings).vectorstore.index
+    else:
+        # What loading a snapshot into memory costs: the whole index plus every chunk
+        index = faiss.read_index(os.path.join(_snapshot_dir(name), "index.faiss"))
+        with open(os.path.join(_snapshot_dir(name), "meta.pkl"), "rb") as f:
+            pickle.load(f)
+        SqliteDocstore(os.path.join(_snapshot_dir(name), "docstore.sqlite")).to_dict()
+    load_seconds = time.perf_counter() - start
+    after_load = rss_mb()
+
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    index.search(rng.random((queries, dim), dtype=np.float32), 4)
+    search_ms = (time.perf_counter() - start) / queries * 1000
+    print(json.dumps({
+        "load_ms": load_seconds * 1000,
+        "after_load": delta(after_load, before),
+        "after_search": delta(rss_mb(), before),
+        "search_ms": search_ms,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--child", choices=["mmap", "full"])
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, "bench", args.dim, args.queries)
+        return
+
+    os.environ.setdefault("APP_CACHE_DIR", tempfile.mkdtemp(prefix="bench_index_"))
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from utils.index_store import save_index
+    from utils.vector_index import DocumentIndex
+
+    rng = np.random.default_rng(0)
+    index = faiss.IndexFlatL2(args.dim)
+    index.add(rng.random((args.vectors, args.dim), dtype=np.float32))
+    ids = [str(i) for i in range(args.vectors)]
+    doc_index = DocumentIndex(DeterministicFakeEmbedding(size=args.dim))
+    doc_index.vectorstore = FAISS(
+        embedding_function=doc_index.embeddings,
+        index=index,
+        docstore=InMemoryDocstore({i: Document(page_content=f"chunk {i}") for i in ids}),
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
+    doc_index.documents = {"bench": {"name": "bench.pdf", "ids": ids}}
+    save_index("bench", doc_index)
+    size_mb = args.vectors * args.dim * 4 / (1024 * 1024)
+    print(f"{args.vectors} x {args.dim} float32 vectors ({size_mb:.0f} MB of index data)")
+
+    for mode in ("full", "mmap"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", mode, "--dim", str(args.dim), "--queries", str(args.queries)],
+            capture_output=True, text=True, check=True, env=os.environ,
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        load, search = result["after_load"], result["after_search"]
+        print(f"{mode:>5}: load {result['load_ms']:8.1f} ms | private +{load['RssAnon']:6.1f} MB, "
+              f"shared +{load['RssFile']:6.1f} MB after load | private +{search['RssAnon']:6.1f} MB, "
+              f"shared +{search['RssFile']:6.1f} MB after search | {result['search_ms']:.1f} ms/query")
+    print("full = index and every chunk read into memory; mmap = load_index, with chunks read per result. "
+          "Shared pages are file-backed: every session using the snapshot maps the same copy.")
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import synthetic  # noqa: F401  (puts the app directory on sys.path)
+    main()
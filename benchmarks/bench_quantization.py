@@ -0,0 +1,65 @@
+"""Index memory and recall@k for each vector storage precision, with and without rescoring
+
+Each storage setting builds the index the app would choose for --vectors
+chunks; rescoring re-ranks RESCORE_FACTOR * k candidates by exact distance,
+as RescoringFAISS does with vectors from the embedding cache.
+
+Usage: python benchmarks/bench_quantization.py [--vectors 100000] [--dim 384] [--queries 200] [--k 10]
+"""
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+import synthetic  # noqa: F401  (puts app/ on sys.path)
+from bench_ann import make_vectors
+from config import RESCORE_FACTOR
+from utils.vector_index import build_index, bytes_per_vector, choose_index_spec
+
+
+def recall(truth, found, k):
+    return np.mean([len(set(t) & set(f[:k])) / k for t, f in zip(truth, found)])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = make_vectors(args.vectors, args.dim, rng)
+    picks = rng.choice(args.vectors, args.queries, replace=False)
+    queries = vectors[picks] + 0.05 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    exact = faiss.IndexFlatL2(args.dim)
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+
+    print(f"{args.vectors} vectors x {args.dim} dims, rescoring {RESCORE_FACTOR * args.k} candidates")
+    print(f"{'storage':<8} {'index':<24} {'bytes/vec':>10} {'vs f32':>7} {'recall':>7} {'rescored':>9} {'ms/query':>9}")
+    baseline = None
+    for storage in ("float32", "float16", "sq8", "pq"):
+        spec = choose_index_spec(args.vectors, args.dim, storage)
+        index = build_index(vectors, spec)
+        size = bytes_per_vector(index)
+        baseline = baseline or size
+
+        _, found = index.search(queries, args.k)
+        start = time.perf_counter()
+        reranked = []
+        for query in queries:
+            _, candidates = index.search(query[None, :], args.k * RESCORE_FACTOR)
+            candidates = candidates[0][candidates[0] >= 0]
+            distances = np.sum((vectors[candidates] - query) ** 2, axis=1)
+            reranked.append(candidates[np.argsort(distances)])
+        per_query = (time.perf_counter() - start) / len(queries) * 1000
+
+        print(f"{spec['storage']:<8} {spec['factory']:<24} {size:10.0f} {baseline / size:6.1f}x "
+              f"{recall(truth, found, args.k):7.3f} {recall(truth, reranked, args.k):9.3f} {per_query:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""A burst of Groq calls against a rate-limited stand-in server
+
+The stub accepts --limit requests per --window seconds and answers the
+rest with 429 and Retry-After. Bare clients without retries fail on the
+429s; calls through the scheduler queue within the limit, retry any 429
+and all succeed, with chat calls served ahead of background summaries
+queued before them.
+
+Usage: python benchmarks/bench_rate_limit.py [--calls 20] [--limit 5] [--window 2]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import synthetic  # noqa: F401  (puts app/ on sys.path)
+from groq_stub import start_stub_server
+
+
+def burst(calls, call):
+    """Run calls concurrently; returns (successes, seconds each call took)"""
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            call(i)
+            return True, time.perf_counter() - start
+        except Exception:
+            return False, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=calls) as pool:
+        results = list(pool.map(timed, range(calls)))
+    return sum(ok for ok, _ in results), [seconds for _, seconds in results]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--window", type=float, default=2.0)
+    args = parser.parse_args()
+
+    server = start_stub_server(rate_limit=args.limit, window=args.window)
+    os.environ["GROQ_BASE_URL"] = server.url
+    # The scheduler is told the stub's limit, with its minute scaled down to the stub's window
+    os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", str(args.limit))
+    os.environ.setdefault("GROQ_TOKENS_PER_MINUTE", "100000000")
+    os.environ.setdefault("GROQ_BACKOFF_BASE_SECONDS", str(args.window / 10))
+    os.environ.setdefault("GROQ_RATE_LIMIT_MARGIN_SECONDS", str(args.window / 40))
+    # Imported after the environment is set so the config picks it up
+    from langchain_groq import ChatGroq
+    from utils.llm_client import get_chat_model
+    from utils import scheduler
+    from utils.scheduler import PRIORITY_BACKGROUND, PRIORITY_CHAT, get_scheduler
+
+    scheduler.WINDOW_SECONDS = args.window
+
+    bare = ChatGroq(model="stub", groq_api_key="stub", base_url=server.url, max_retries=0)
+    ok, seconds = burst(args.calls, lambda i: bare.invoke(f"question {i}"))
+    print(f"bare client:     {ok:3d}/{args.calls} succeeded, {server.rate_limited} rate limited")
+    time.sleep(args.window)
+
+    # Most of the burst is background summaries, queued just before a few chat turns
+    chat_from = args.calls - args.calls // 4
+
+    def scheduled(i):
+        if i >= chat_from:
+            time.sleep(0.05)
+            get_chat_model("stub", "stub", priority=PRIORITY_CHAT).invoke(f"question {i}")
+        else:
+            get_chat_model("stub", "stub", priority=PRIORITY_BACKGROUND).invoke(f"summary {i}")
+
+    ok, seconds = burst(args.calls, scheduled)
+    stats = get_scheduler().stats()
+    print(f"scheduled:       {ok:3d}/{args.calls} succeeded, {stats['retries']} retries, "
+          f"{stats['rate_limited']} rate limited")
+    print(f"  background summaries: {sum(seconds[:chat_from]) / chat_from:6.2f}s avg latency")
+    print(f"  chat turns:           {sum(seconds[chat_from:]) / (args.calls - chat_from):6.2f}s avg latency")
+
+
+if __name__ == "__main__":
+    main()
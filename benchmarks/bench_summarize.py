@@ -0,0 +1,52 @@
+"""Map-reduce summarization of a long transcript, sequential vs. concurrent
+
+Runs against the local stand-in server with a fixed per-call delay, so
+the wall time is dominated by Groq round trips as in the app. The
+default text is about the length of a one-hour video transcript; a
+longer --reply-words makes each summary bigger and the reduce tree deeper.
+
+Usage: python benchmarks/bench_summarize.py [--words 9000] [--delay 1.0] [--model llama2-70b] [--reply-words 6]
+"""
+import argparse
+import os
+import time
+
+from synthetic import make_text
+from groq_stub import start_stub_server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=9000)
+    parser.add_argument("--delay", type=float, default=1.0)
+    parser.add_argument("--model", default="llama2-70b", help="Groq model id; sets the chunk size")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--reply-words", type=int, default=6, help="length of each stand-in summary")
+    args = parser.parse_args()
+
+    server = start_stub_server(args.delay, reply=make_text(args.reply_words))
+    os.environ["GROQ_BASE_URL"] = server.url
+    # The stub has no rate limit, so don't let the scheduler's default one pace the benchmark
+    os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", "100000")
+    os.environ.setdefault("GROQ_TOKENS_PER_MINUTE", "100000000")
+    # Imported after the environment is set so the config picks it up
+    from utils.llm_client import get_chat_model
+    from utils.summarizer import summarize
+
+    text = make_text(args.words)
+    llm = get_chat_model(args.model, "stub")
+    for workers in args.concurrency:
+        requests = server.requests
+        stats = {}
+        start = time.perf_counter()
+        summarize(text, llm, args.model, "video", max_workers=workers, stats=stats)
+        elapsed = time.perf_counter() - start
+        print(f"concurrency {workers:3d}: {elapsed:6.2f}s  {server.requests - requests:3d} requests served  "
+              f"{stats['chunks']} chunks  {stats['calls']} calls  {stats['tokens']} tokens")
+        for depth, level in enumerate(stats.get("reduce_levels", []), 1):
+            print(f"    reduce level {depth}: {level['inputs']:3d} summaries in {level['batches']:3d} batches, "
+                  f"fan-out {level['fan_out']:2d}, {level['tokens']:6d} tokens")
+
+
+if __name__ == "__main__":
+    main()
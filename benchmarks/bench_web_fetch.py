@@ -0,0 +1,65 @@
+"""Fetching a web page repeatedly: bare requests.get vs. the pooled, cached fetcher
+
+Runs against a local web server, so the numbers show connection setup
+and download cost without TLS or internet latency. Also checks that a
+page trickling in is cut off at the deadline and a huge one at the cap.
+
+Usage: python benchmarks/bench_web_fetch.py [--fetches 20] [--words 3000]
+"""
+import argparse
+import sys
+import tempfile
+import time
+
+import requests
+
+from web_stub import start_web_stub
+from utils.web_fetcher import WebFetcher
+
+
+def run(label, fetch, fetches, server):
+    connections, served, not_modified = server.connections, server.requests, server.not_modified
+    start = time.perf_counter()
+    for _ in range(fetches):
+        fetch()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<30} {elapsed / fetches * 1000:7.2f} ms/fetch  "
+          f"{server.connections - connections:3d} connections  {server.requests - served:3d} requests  "
+          f"{server.not_modified - not_modified:3d} not modified")
+
+
+def expect_failure(label, fetch):
+    start = time.perf_counter()
+    try:
+        fetch()
+    except (requests.RequestException, ValueError) as e:
+        print(f"{label:<30} failed after {time.perf_counter() - start:5.2f}s: {e}")
+    else:
+        sys.exit(f"{label}: did not fail")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fetches", type=int, default=20)
+    parser.add_argument("--words", type=int, default=3000)
+    args = parser.parse_args()
+
+    server = start_web_stub(args.words)
+    page_url = f"{server.url}/page"
+    with tempfile.TemporaryDirectory() as cache_dir:
+        uncached = WebFetcher(cache_dir=None)
+        cached = WebFetcher(cache_dir=cache_dir)
+        revalidating = WebFetcher(cache_dir=cache_dir, fresh_seconds=0)
+
+        run("requests.get per fetch", lambda: requests.get(page_url, timeout=10), args.fetches, server)
+        run("pooled session, no cache", lambda: uncached.fetch(page_url), args.fetches, server)
+        run("pooled session, fresh cache", lambda: cached.fetch(page_url), args.fetches, server)
+        run("pooled session, revalidating", lambda: revalidating.fetch(page_url), args.fetches, server)
+
+        limited = WebFetcher(cache_dir=None, timeout=(2, 2), deadline=3, max_bytes=5 * 1024 * 1024)
+        expect_failure("page trickling in, 3s deadline", lambda: limited.fetch(f"{server.url}/slow"))
+        expect_failure("64 MB page, 5 MB cap", lambda: limited.fetch(f"{server.url}/huge"))
+
+
+if __name__ == "__main__":
+    main()
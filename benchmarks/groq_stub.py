@@ -0,0 +1,143 @@
+"""Local stand-in for the Groq chat completions API
+
+Answers POST /openai/v1/chat/completions with a fixed completion after an
+optional delay, streamed word by word when the request asks for it, and
+counts the TCP connections it accepts, so benchmarks can run the real
+ChatGroq client offline by pointing GROQ_BASE_URL at it. With rate_limit
+set it accepts at most that many requests per window seconds and answers
+the rest with 429 and a Retry-After header, as Groq does.
+"""
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delay: float = 0.0, reply: str = "ok", token_delay: float = 0.0,
+                 rate_limit: int = 0, window: float = 60.0):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.delay = delay
+        self.reply = reply
+        self.token_delay = token_delay
+        self.rate_limit = rate_limit
+        self.window = window
+        self.connections = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self._accepted = deque()
+        self._lock = threading.Lock()
+
+    def retry_after(self) -> float:
+        """Seconds until another request fits the rate limit, or 0 after recording an accepted one"""
+        now = time.monotonic()
+        with self._lock:
+            while self._accepted and now - self._accepted[0] >= self.window:
+                self._accepted.popleft()
+            if self.rate_limit and len(self._accepted) >= self.rate_limit:
+                self.rate_limited += 1
+                return self._accepted[0] + self.window - now
+            self._accepted.append(now)
+            return 0.0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.server._lock:
+            self.server.requests += 1
+        retry_after = self.server.retry_after()
+        if retry_after:
+            self._rate_limited(retry_after)
+            return
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if body.get("stream"):
+            self._stream(body)
+            return
+        payload = json.dumps({
+            "id": f"stub-{self.server.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.server.reply},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _rate_limited(self, retry_after):
+        payload = json.dumps({"error": {
+            "message": "Rate limit reached, please try again later",
+            "type": "requests",
+            "code": "rate_limit_exceeded",
+        }}).encode()
+        self.send_response(429)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Retry-After", f"{retry_after:.2f}")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, body):
+        """Send the reply as server-sent completion chunks, one word per chunk"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = self.server.reply.split(" ")
+        for i, word in enumerate(words):
+            if self.server.token_delay:
+                time.sleep(self.server.token_delay)
+            self._send_event({
+                "id": f"stub-{self.server.requests}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": word if i == 0 else " " + word},
+                    "finish_reason": "stop" if i == len(words) - 1 else None,
+                }],
+            })
+        self._send_chunk(b"data: [DONE]\n\n")
+        self._send_chunk(b"")
+
+    def _send_event(self, data):
+        self._send_chunk(f"data: {json.dumps(data)}\n\n".encode())
+
+    def _send_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+def start_stub_server(delay: float = 0.0, reply: str = "ok", token_delay: float = 0.0,
+                      rate_limit: int = 0, window: float = 60.0) -> StubServer:
+    """Start a stub server on a free local port in a background thread"""
+    server = StubServer(delay, reply, token_delay, rate_limit, window)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,74 @@
+"""Synthetic inputs shared by the benchmark scripts"""
+import random
+import sys
+from pathlib import Path
+
+# Make the app modules importable the same way the Streamlit pages do
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.append(str(APP_DIR))
+
+WORDS = (
+    "the model document retrieval vector index page section handbook policy "
+    "employee safety procedure device manual chapter figure table reference "
+    "customer contract payment service warranty network server request latency "
+    "throughput memory storage system process thread cache token prompt answer"
+).split()
+
+
+def make_text(n_words: int, seed: int = 0) -> str:
+    """Generate pseudo-random prose with sentence and paragraph breaks"""
+    rng = random.Random(seed)
+    out = []
+    for i in range(n_words):
+        out.append(rng.choice(WORDS))
+        if i % 17 == 16:
+            out[-1] += "."
+        if i % 120 == 119:
+            out[-1] += "\n\n"
+    return " ".join(out)
+
+
+def make_pdf(n_pages: int, words_per_page: int = 350, seed: int = 0) -> bytes:
+    """Build a minimal multi-page PDF with one text stream per page"""
+    rng = random.Random(seed)
+    objects = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")
+    pages = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    kids = []
+    for _ in range(n_pages):
+        lines = []
+        words = [rng.choice(WORDS) for _ in range(words_per_page)]
+        for i in range(0, len(words), 12):
+            lines.append("(" + " ".join(words[i:i + 12]) + ") Tj T*")
+        content = ("BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(lines) + " ET").encode()
+        stream = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages, font, stream)
+        ))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages
+    objects[pages - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids)
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog, xref
+    )
+    return bytes(out)
@@ -0,0 +1,105 @@
+"""Local web server for the fetcher benchmark
+
+Serves GET /page as an HTML article with an ETag and Last-Modified,
+answering 304 to a matching If-None-Match or If-Modified-Since; /slow
+trickles a page out one byte per second, and /huge streams more bytes
+than any sensible download cap. Counts connections, requests and 304s.
+"""
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from synthetic import make_text
+
+
+class WebStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, words: int = 3000):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.body = f"<html><head><title>Stub</title></head><body><p>{make_text(words)}</p></body></html>".encode()
+        self.etag = '"stub-1"'
+        self.last_modified = formatdate(time.time() - 3600, usegmt=True)
+        self.connections = 0
+        self.requests = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; don't let Nagle hold the body back on a kept-alive connection
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        with self.server._lock:
+            self.server.requests += 1
+        if self.path == "/slow":
+            self._trickle()
+        elif self.path == "/huge":
+            self._huge()
+        else:
+            self._page()
+
+    def _page(self):
+        server = self.server
+        if (self.headers.get("If-None-Match") == server.etag
+                or self.headers.get("If-Modified-Since") == server.last_modified):
+            with server._lock:
+                server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", server.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(server.body)))
+        self.send_header("ETag", server.etag)
+        self.send_header("Last-Modified", server.last_modified)
+        self.end_headers()
+        self.wfile.write(server.body)
+
+    def _trickle(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            for byte in b"<html><body>" + b"x" * 120:
+                self.wfile.write(bytes([byte]))
+                self.wfile.flush()
+                time.sleep(1.0)
+        except OSError:
+            pass
+
+    def _huge(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        block = b"<p>" + b"x" * 65533
+        try:
+            for _ in range(1024):
+                self.wfile.write(block)
+        except OSError:
+            pass
+
+
+def start_web_stub(words: int = 3000) -> WebStubServer:
+    """Start the server on a free port in a background thread"""
+    server = WebStubServer(words)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
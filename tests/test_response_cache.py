@@ -0,0 +1,45 @@
+import string
+
+import numpy as np
+
+from utils.response_cache import MemoryBackend, ResponseCache, identifiers
+
+
+class LetterEmbeddings:
+    """Embeds a question by its letter counts, so questions differing only in numbers embed identically"""
+
+    def embed_query(self, text):
+        return np.array([text.lower().count(letter) for letter in string.ascii_lowercase], dtype=np.float32)
+
+
+def make_cache(similarity=0.95):
+    return ResponseCache(MemoryBackend(100), embeddings=LetterEmbeddings(), similarity=similarity)
+
+
+def test_identifiers_are_numbers_and_tokens_with_digits():
+    assert identifiers("Torque for bolt M8, section 3?") == {"m8", "3"}
+    assert identifiers("What is the leave policy") == frozenset()
+
+
+def test_reworded_question_hits_by_similarity():
+    cache = make_cache()
+    cache.put("model", "English", "ctx", "What is the torque for bolt M8?", "25 Nm")
+    entry = cache.get("model", "English", "ctx", "what's the torque for bolt m8")
+    assert entry is not None and entry["answer"] == "25 Nm"
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_similar_question_with_other_numbers_misses():
+    cache = make_cache()
+    cache.put("model", "English", "ctx", "torque for bolt M8", "25 Nm")
+    cache.put("model", "English", "ctx", "what does section 3 say", "Leave policy")
+    assert cache.get("model", "English", "ctx", "torque for bolt M10") is None
+    assert cache.get("model", "English", "ctx", "what does section 4 say") is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_similarity_zero_only_matches_exactly():
+    cache = make_cache(similarity=0)
+    cache.put("model", "English", "ctx", "torque for bolt M8", "25 Nm")
+    assert cache.get("model", "English", "ctx", "Torque for bolt M8?")["answer"] == "25 Nm"
+    assert cache.get("model", "English", "ctx", "the torque for bolt M8") is None
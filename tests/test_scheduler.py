@@ -0,0 +1,63 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_groq import ChatGroq
+
+from groq_stub import start_stub_server
+from utils import scheduler
+from utils.scheduler import PRIORITY_BACKGROUND, PRIORITY_CHAT, RateLimitScheduler
+
+WINDOW = 1.0
+
+
+@pytest.fixture
+def limit(monkeypatch):
+    """Scale the scheduler's minute down to WINDOW and set the requests allowed in it"""
+    def set_limit(requests_per_window):
+        monkeypatch.setattr(scheduler, "WINDOW_SECONDS", WINDOW)
+        monkeypatch.setattr(scheduler, "rate_limits_for", lambda model_id: (requests_per_window, 10 ** 9))
+    return set_limit
+
+
+def test_burst_stays_within_the_server_rate_limit(limit):
+    limit(4)
+    server = start_stub_server(rate_limit=4, window=WINDOW)
+    try:
+        sched = RateLimitScheduler(max_retries=4, backoff_base=0.1, margin=0.05)
+        llm = ChatGroq(model="stub", groq_api_key="stub", base_url=server.url, max_retries=0)
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            results = list(pool.map(
+                lambda i: sched.run("key", "stub", 1, lambda: llm.invoke(f"question {i}")), range(12)
+            ))
+    finally:
+        server.shutdown()
+    assert len(results) == 12
+    assert server.rate_limited == 0
+    assert sched.stats()["retries"] == 0
+
+
+def test_chat_calls_are_served_before_queued_background_calls(limit):
+    limit(1)
+    sched = RateLimitScheduler(margin=0.0)
+    order = []
+    lock = threading.Lock()
+
+    def call(label, priority):
+        def fn():
+            with lock:
+                order.append(label)
+        sched.run("key", "stub", 1, fn, priority)
+
+    # Uses up the window, so everything after it queues
+    call("first", PRIORITY_BACKGROUND)
+    threads = [threading.Thread(target=call, args=(f"background {i}", PRIORITY_BACKGROUND)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    chat = threading.Thread(target=call, args=("chat", PRIORITY_CHAT))
+    chat.start()
+    for thread in threads + [chat]:
+        thread.join()
+    assert order == ["first", "chat", "background 0", "background 1"]
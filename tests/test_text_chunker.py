@@ -0,0 +1,16 @@
+from config import PROMPT_OVERHEAD_TOKENS, SUMMARY_OUTPUT_TOKENS
+from utils import text_chunker
+
+
+def test_summary_chunks_fit_the_tokens_per_minute_limit(monkeypatch):
+    monkeypatch.setattr(text_chunker, "context_length_for", lambda model_id: 200000)
+    monkeypatch.setattr(text_chunker, "rate_limits_for", lambda model_id: (30, 6000))
+    chunk_tokens, _ = text_chunker.summary_chunk_sizes("large")
+    assert chunk_tokens + PROMPT_OVERHEAD_TOKENS + SUMMARY_OUTPUT_TOKENS <= 6000
+
+
+def test_summary_chunks_fit_the_context_when_it_is_smaller(monkeypatch):
+    monkeypatch.setattr(text_chunker, "context_length_for", lambda model_id: 4096)
+    monkeypatch.setattr(text_chunker, "rate_limits_for", lambda model_id: (30, 15000))
+    chunk_tokens, _ = text_chunker.summary_chunk_sizes("small")
+    assert chunk_tokens + PROMPT_OVERHEAD_TOKENS + min(SUMMARY_OUTPUT_TOKENS, 1024) <= 4096
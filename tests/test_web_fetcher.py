@@ -0,0 +1,74 @@
+import time
+
+import pytest
+import requests
+
+from web_stub import start_web_stub
+from utils.web_fetcher import WebFetcher
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = start_web_stub(words=500)
+    yield server
+    server.shutdown()
+
+
+def test_reuses_one_keep_alive_connection(server):
+    fetcher = WebFetcher(cache_dir=None)
+    connections, requests_before = server.connections, server.requests
+    pages = [fetcher.fetch(f"{server.url}/page") for _ in range(5)]
+    assert server.connections - connections == 1
+    assert server.requests - requests_before == 5
+    assert all(page.source == "network" and page.content == server.body for page in pages)
+    assert pages[0].encoding == "utf-8"
+
+
+def test_serves_fresh_pages_from_disk(server, tmp_path):
+    fetcher = WebFetcher(cache_dir=str(tmp_path))
+    requests_before = server.requests
+    first = fetcher.fetch(f"{server.url}/page")
+    second = fetcher.fetch(f"{server.url}/page")
+    assert (first.source, second.source) == ("network", "cache")
+    assert second.content == server.body
+    assert server.requests - requests_before == 1
+    # Another fetcher on the same directory sees the page too
+    assert WebFetcher(cache_dir=str(tmp_path)).fetch(f"{server.url}/page").source == "cache"
+
+
+def test_revalidates_stale_pages_with_a_conditional_get(server, tmp_path):
+    fetcher = WebFetcher(cache_dir=str(tmp_path), fresh_seconds=0)
+    not_modified = server.not_modified
+    first = fetcher.fetch(f"{server.url}/page")
+    second = fetcher.fetch(f"{server.url}/page")
+    assert (first.source, second.source) == ("network", "revalidated")
+    assert second.content == server.body
+    assert server.not_modified - not_modified == 1
+    assert fetcher.stats()["revalidated"] == 1
+
+
+def test_refresh_revalidates_a_fresh_page(server, tmp_path):
+    fetcher = WebFetcher(cache_dir=str(tmp_path))
+    fetcher.fetch(f"{server.url}/page")
+    assert fetcher.fetch(f"{server.url}/page", refresh=True).source == "revalidated"
+
+
+def test_cuts_off_a_page_trickling_in_at_the_deadline(server):
+    fetcher = WebFetcher(cache_dir=None, timeout=(2, 2), deadline=1)
+    start = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        fetcher.fetch(f"{server.url}/slow")
+    assert time.monotonic() - start < 3
+
+
+def test_stops_downloading_past_the_byte_cap(server):
+    fetcher = WebFetcher(cache_dir=None, max_bytes=1024 * 1024)
+    with pytest.raises(ValueError):
+        fetcher.fetch(f"{server.url}/huge")
+
+
+def test_evicts_pages_beyond_the_cache_size(server, tmp_path):
+    fetcher = WebFetcher(cache_dir=str(tmp_path), max_cache_bytes=0)
+    fetcher.fetch(f"{server.url}/page")
+    assert fetcher.stats()["evictions"] == 1
+    assert not list(tmp_path.glob("*.page"))